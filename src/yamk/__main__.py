@@ -1,22 +1,57 @@
-from yamk.command.make import MakeCommand
+from __future__ import annotations
+
+import sys
+from typing import TYPE_CHECKING
+
 from yamk.lib.cli import parse_args
+from yamk.lib.daemon import Daemon, request
+
+if TYPE_CHECKING:
+    from yamk.command.make import MakeCommand
+    from yamk.lib.cli import CliArgs
 
 
 def main() -> None:
     args = parse_args()
-    MakeCommand(
+    if args.daemon:
+        Daemon(args.cookbook, build=make, warm=make_command).serve()
+        return
+    if (status := request(args)) is not None:
+        sys.exit(status)
+    make(args)
+
+
+def make(args: CliArgs) -> None:
+    command = make_command(args)
+    if args.watch:
+        command.watch()
+    else:
+        command.make()
+
+
+def make_command(args: CliArgs) -> MakeCommand:
+    from yamk.command.make import MakeCommand  # noqa: PLC0415
+
+    return MakeCommand(
         bare=args.bare,
         cookbook=args.cookbook,
         cookbook_type=args.cookbook_type,
         dry_run=args.dry_run,
         echo_override=args.echo_override,
+        engine=args.engine,
         extra=args.extra,
         force_make=args.force_make,
+        jobs=args.jobs,
+        jobserver_style=args.jobserver_style,
+        keep_going=args.keep_going,
+        max_load=args.max_load,
+        min_free_memory=args.min_free_memory,
         print_timing_report=args.print_timing_report,
         retries=args.retries,
+        schedule=args.schedule,
         shell=args.shell,
         target=args.target,
         up_to_date=args.up_to_date,
         variables=args.variables,
         verbosity=args.verbosity,
-    ).make()
+    )
@@ -1,34 +1,92 @@
 from __future__ import annotations
 
-import itertools
+import asyncio
+import copy
+import json
 import os
 import pathlib
+import random
 import re
+import shlex
+import shutil
+import stat
 import subprocess
 import sys
-from time import sleep
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from time import sleep, time, time_ns
 from typing import TYPE_CHECKING, Literal, cast
 
-from dj_settings import ConfigParser
 from pyutilkit.term import SGRCodes, SGROutput, SGRString
 from pyutilkit.timing import Stopwatch
 
 from yamk.__version__ import __version__
+from yamk.lib.artifacts import ArtifactCache, artifact_key, get_backend
+from yamk.lib.cookbook import cookbook_signature, load_cookbook
+from yamk.lib.fs import Fingerprints, newest_mtime, stats
+from yamk.lib.jobserver import Jobserver
+from yamk.lib.scheduler import Resources, Scheduler, Throttle
+from yamk.lib.shell import (
+    PERSISTENT_SHELLS,
+    TIMED_OUT,
+    ShellSession,
+    await_process,
+    wait_process,
+)
+from yamk.lib.state import State, state_path
 from yamk.lib.utils import (
     DAG,
     CommandReport,
+    Invocation,
     Node,
     Recipe,
     Version,
     extract_options,
     human_readable_timestamp,
+    parse_duration,
+    parse_size,
     print_reports,
+    split_command,
 )
+from yamk.lib.watch import Watcher
 
 if TYPE_CHECKING:
-    from collections.abc import Iterator
+    from collections.abc import Generator, Iterator
+    from concurrent.futures import Future
+    from contextlib import AbstractAsyncContextManager, AbstractContextManager
+
+    from pyutilkit.timing import Timing
+
+    from yamk.lib.cookbook import RawCookbook, Signature
+    from yamk.lib.type_defs import (
+        ExecKwargs,
+        ExistenceCheck,
+        JSONType,
+        RawRecipe,
+        SubprocessKwargs,
+    )
 
-    from yamk.lib.type_defs import ExistenceCheck, RawRecipe, SubprocessKwargs
+    RecipesKey = tuple[
+        pathlib.Path,
+        str | None,
+        tuple[tuple[str, str], ...],
+        tuple[tuple[str, str], ...],
+    ]
+    Recipes = tuple[
+        Signature,
+        RawCookbook,
+        dict[str, Recipe],
+        dict[re.Pattern[str], Recipe],
+        dict[str, str],
+    ]
+
+NOT_EXECUTABLE = 126
+NOT_FOUND = 127
+CANCELLED = 130
+MAX_CHECK_JOBS = 32
+FS_FUNCTION = re.compile(r"\$\(\((?:exists|glob)\b")
+RECIPES: dict[RecipesKey, Recipes] = {}
 
 
 class MakeCommand:
@@ -42,9 +100,16 @@ class MakeCommand:
         dry_run: bool,
         echo_override: bool,
         extra: list[str],
+        engine: Literal["subprocess", "asyncio"],
         force_make: bool,
+        jobs: int,
+        jobserver_style: Literal["pipe", "fifo"],
+        keep_going: bool,
+        max_load: float | None,
+        min_free_memory: int | None,
         print_timing_report: bool,
         retries: int,
+        schedule: Literal["c3", "critical-path"],
         shell: str | None,
         up_to_date: list[str],
         variables: dict[str, str],
@@ -58,77 +123,554 @@ class MakeCommand:
         self.bare = bare
         self.force_make = force_make
         self.extra = extra
+        self.jobs = jobs
+        self.jobserver_style = jobserver_style
+        self.keep_going = keep_going
+        self.throttle = None
+        if max_load is not None or min_free_memory is not None:
+            self.throttle = Throttle(max_load=max_load, min_free_memory=min_free_memory)
         self.retries = retries
+        self.schedule = schedule
         self.dry_run = dry_run
         self.echo_override = echo_override
+        self.engine = engine
         self.base_dir = cookbook.parent
         self.phony_dir = self.base_dir.joinpath(".yamk")
+        self.state = State(state_path(cookbook))
+        self.stats = stats
+        self.stats.clear()
         self.arg_vars = variables
-        parsed_cookbook = ConfigParser([cookbook], force_type=cookbook_type).data
-        self.globals = parsed_cookbook.pop("$globals", {})
+        key: RecipesKey = (
+            cookbook,
+            cookbook_type,
+            tuple(sorted(os.environ.items())),
+            tuple(sorted(variables.items())),
+        )
+        signature = cookbook_signature(cookbook)
+        cached = RECIPES.get(key)
+        if cached is None or cached[0] != signature:
+            cached = None
+            parsed_cookbook = load_cookbook(cookbook, cookbook_type)
+            self.globals = parsed_cookbook.pop("$globals", {})
+        else:
+            parsed_cookbook = {}
+            self.globals = copy.deepcopy(cached[1])
         self.version = self._get_version()
         if self.version > Version.from_string(__version__):
             msg = f"This cookbook requires an yamk >= v{self.version}"
             raise RuntimeError(msg)
+        self.pools = self._get_pools()
+        self.freshness = self._get_freshness()
+        self.fingerprints = Fingerprints(self.state, self.stats)
+        self.artifacts = self._get_artifacts()
         self.up_to_date = up_to_date
-        self._parse_recipes(parsed_cookbook)
+        if cached is None:
+            self._parse_recipes(parsed_cookbook)
+            if self._cacheable(parsed_cookbook):
+                RECIPES[key] = (
+                    signature,
+                    copy.deepcopy(self.globals),
+                    self.static_recipes.copy(),
+                    self.regex_recipes.copy(),
+                    self.aliases.copy(),
+                )
+        else:
+            _, _, static_recipes, regex_recipes, aliases = cached
+            self.static_recipes = static_recipes.copy()
+            self.regex_recipes = regex_recipes.copy()
+            self.aliases = aliases.copy()
         self.subprocess_kwargs: SubprocessKwargs = {
             "shell": True,
             "cwd": self.base_dir,
             "executable": self.globals.get("shell") or shell,
         }
+        self.exec_kwargs: ExecKwargs = {
+            "cwd": None if self.base_dir == pathlib.Path.cwd() else self.base_dir,
+            "close_fds": False,
+        }
         self.print_timing_report = print_timing_report
         self.reports: list[CommandReport] = []
+        self.existence: dict[str, bool] = {}
+        self.legacy_phony: list[pathlib.Path] = []
+        self.cut_off: set[Node] = set()
+        self.timings: dict[str, int] = {}
+        self.scheduler: Scheduler | None = None
+        self.cancelled = threading.Event()
 
     def make(self) -> None:
         dag = self._preprocess_target()
-        for node in filter(lambda x: x.should_build, dag):
-            self._make_target(node)
+        return_code = self._build(dag)
+        if return_code:
+            sys.exit(return_code)
+
+    def watch(self) -> None:
+        dag = self._preprocess_target()
+        watcher = Watcher(self._watched_paths(dag))
+        dirty: set[Node] = set()
+        building = set(dag)
+        changes: set[Node] = set()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            build: Future[bool] | None = executor.submit(self._rebuild, dag, set())
+            try:
+                while True:
+                    if build is not None and build.done():
+                        if not self._completed(build):
+                            dirty |= building
+                        build = None
+                    if dirty and build is None and not changes:
+                        building, dirty = dirty, set()
+                        self.cancelled.clear()
+                        build = executor.submit(self._rebuild, dag, building)
+                    watcher.wait()
+                    if changes := watcher.changes():
+                        dirty |= changes
+                        if build is not None:
+                            self.cancelled.set()
+            except KeyboardInterrupt:
+                self.cancelled.set()
+
+    def _rebuild(self, dag: DAG, dirty: set[Node]) -> bool:
+        self.reports = []
+        self.timings.clear()
+        self.existence.clear()
+        self.cut_off.clear()
+        self.stats.clear()
+        self._refresh(dag, self._closure(dirty))
+        built = {node for node in dag if node.should_build}
+        self._build(dag)
+        self._refresh(dag, built)
+        for node in dag:
+            node.should_build = False
+        return not self.cancelled.is_set()
+
+    def _refresh(self, dag: DAG, nodes: set[Node]) -> None:
+        for node in dag:
+            if node in nodes:
+                node.should_build, node.timestamp = self._should_build(node)
+
+    @staticmethod
+    def _closure(nodes: set[Node]) -> set[Node]:
+        closure = set(nodes)
+        unvisited = list(nodes)
+        while unvisited:
+            for parent in unvisited.pop().required_by:
+                if parent not in closure:
+                    closure.add(parent)
+                    unvisited.append(parent)
+        return closure
+
+    @staticmethod
+    def _completed(build: Future[bool]) -> bool:
+        try:
+            return build.result()
+        except Exception as exc:  # noqa: BLE001
+            SGRString(f"{exc.__class__.__name__}: {exc}").print()
+            return True
+
+    def _watched_paths(self, dag: DAG) -> dict[Node, tuple[pathlib.Path, bool]]:
+        paths = {}
+        for node in dag:
+            recipe = node.recipe
+            if recipe is None:
+                paths[node] = (self._file_path(node.target), False)
+            elif not recipe.phony and recipe.recursive:
+                paths[node] = (self._file_path(node.target), True)
+        return paths
+
+    def _build(self, dag: DAG) -> int:
+        timings = None
+        if self.schedule == "critical-path":
+            timings = cast("dict[str, int]", self.state.items("timings"))
+        with self._jobserver() as jobserver:
+            self.scheduler = scheduler = Scheduler(
+                dag,
+                jobs=self.jobs if jobserver is None else max(self.jobs, jobserver.jobs),
+                schedule=self.schedule,
+                timings=timings,
+                throttle=self.throttle,
+                keep_going=self.keep_going,
+                backoff=any(
+                    self._retries(node.recipe) for node in dag if node.should_build
+                ),
+                jobserver=jobserver,
+                resources=self._resources(dag),
+                pools=self.pools,
+            )
+            if self.engine == "asyncio":
+                return_code = asyncio.run(scheduler.arun(self._amake_target))
+            else:
+                return_code = scheduler.run(self._make_target)
+        if self.artifacts is not None:
+            self.artifacts.wait()
+        self._save_state()
         if self.print_timing_report:
             print_reports(self.reports)
+        if self.keep_going and scheduler.failed and not self.cancelled.is_set():
+            self._print_summary(scheduler.failed, scheduler.skipped)
+        return return_code
+
+    def _save_state(self) -> None:
+        for target in list(self.state.items("phony")):
+            recipe = self._extract_recipe(target)
+            if recipe is None or not recipe.phony or not recipe.keep_ts:
+                self.state.delete("phony", target)
+        if not self.state.save():
+            return
+        for path in self.legacy_phony:
+            path.unlink(missing_ok=True)
+        self.legacy_phony.clear()
+
+    def _resources(self, dag: DAG) -> dict[Node, Resources]:
+        resources = {}
+        for node in dag:
+            recipe = node.recipe
+            if recipe is None or not node.should_build:
+                continue
+            for pool in recipe.pools:
+                if pool not in self.pools:
+                    msg = f"{node.target} uses the undefined pool {pool}"
+                    raise ValueError(msg)
+            resources[node] = Resources(weight=recipe.weight, pools=tuple(recipe.pools))
+        return resources
+
+    def _jobserver(self) -> AbstractContextManager[Jobserver | None]:
+        jobserver = Jobserver.from_makeflags(os.environ.get("MAKEFLAGS", ""))
+        if jobserver is None and self.jobs > 1:
+            jobserver = Jobserver.create(self.jobs, style=self.jobserver_style)
+        if jobserver is None:
+            return nullcontext()
+
+        env = {**os.environ, "MAKEFLAGS": jobserver.makeflags}
+        self.subprocess_kwargs["env"] = self.exec_kwargs["env"] = env
+        if jobserver.pass_fds:
+            self.subprocess_kwargs["pass_fds"] = jobserver.pass_fds
+        return jobserver
 
-    def _run_command(self, command: str) -> int:
+    def _command_steps(
+        self,
+        command: str,
+        options: set[str],
+        node: Node,
+        session: ShellSession | None,
+    ) -> Generator[Invocation | float, int | None, int]:
         status = 0
         if self.dry_run:
             return status
 
+        invocation = Invocation(
+            command=command,
+            args=self._direct_args(command, options, node, session),
+            timeout=self._command_timeout(node.recipe, options),
+        )
+        retries = self._retries(node.recipe)
         a, b = 1, 1
         stopwatch = Stopwatch()
-        for i in range(self.retries + 1):
+        for i in range(retries + 1):
+            timed_out = False
             with stopwatch:
-                result = subprocess.run(  # noqa: PLW1510, S603
-                    command, **self.subprocess_kwargs
-                )
-            status = result.returncode
-            if status == 0:
+                try:
+                    status = cast("int", (yield invocation))
+                except subprocess.TimeoutExpired:
+                    status, timed_out = TIMED_OUT, True
+                except OSError as error:
+                    if invocation.args is None:
+                        raise
+                    status = self._exec_failed(error)
+            if status == 0 or not self._should_retry(node.recipe, status):
                 break
 
-            if i != self.retries:
+            if i != retries:
                 a, b = b, a + b
-                SGRString(f"{command} failed. Retrying in {a}s...").print()
-                sleep(a)
+                delay = self._backoff(node.recipe, a)
+                reason = "timed out" if timed_out else "failed"
+                SGRString(f"{command} {reason}. Retrying in {delay:g}s...").print()
+                yield delay
+
+        self._report(
+            command,
+            node,
+            stopwatch.elapsed,
+            retries=i,
+            status=status,
+            timed_out=timed_out,
+        )
+        return status
+
+    def _retries(self, recipe: Recipe | None) -> int:
+        if recipe is None or recipe.retries is None:
+            return self.retries
+        return recipe.retries
+
+    @staticmethod
+    def _should_retry(recipe: Recipe | None, status: int) -> bool:
+        return recipe is None or recipe.retry_on is None or status in recipe.retry_on
+
+    @staticmethod
+    def _backoff(recipe: Recipe | None, delay: float) -> float:
+        if recipe is None:
+            return delay
+        if recipe.max_backoff is not None:
+            delay = min(delay, recipe.max_backoff)
+        if recipe.jitter:
+            delay += random.uniform(0, recipe.jitter)  # noqa: S311
+        return delay
+
+    def _released(self, node: Node) -> AbstractContextManager[None]:
+        if self.scheduler is None:
+            return nullcontext()
+        return self.scheduler.released(node)
+
+    def _areleased(self, node: Node) -> AbstractAsyncContextManager[None]:
+        if self.scheduler is None:
+            return nullcontext()
+        return self.scheduler.areleased(node)
+
+    def _execute(self, invocation: Invocation, session: ShellSession | None) -> int:
+        command, args, timeout = invocation.command, invocation.args, invocation.timeout
+        if args is None and session is not None:
+            return session.run(command, timeout)
+        if timeout is not None:
+            if args is not None:
+                process = subprocess.Popen(args, process_group=0, **self.exec_kwargs)  # noqa: S603
+            else:
+                process = subprocess.Popen(  # noqa: S603
+                    command, process_group=0, **self.subprocess_kwargs
+                )
+            return wait_process(process, timeout)
+        if args is not None:
+            result = subprocess.run(args, **self.exec_kwargs)  # noqa: PLW1510, S603
+        else:
+            result = subprocess.run(command, **self.subprocess_kwargs)  # noqa: PLW1510, S603
+        return result.returncode
+
+    async def _aexecute(
+        self, invocation: Invocation, session: ShellSession | None
+    ) -> int:
+        command, args, timeout = invocation.command, invocation.args, invocation.timeout
+        if args is None and session is not None:
+            return await asyncio.to_thread(session.run, command, timeout)
+        if timeout is not None:
+            if args is not None:
+                process = await asyncio.create_subprocess_exec(
+                    *args, process_group=0, **self.exec_kwargs
+                )
+            else:
+                process = await asyncio.create_subprocess_shell(
+                    command, process_group=0, **self.subprocess_kwargs
+                )
+            return await await_process(process, timeout)
+        if args is not None:
+            process = await asyncio.create_subprocess_exec(*args, **self.exec_kwargs)
+        else:
+            process = await asyncio.create_subprocess_shell(
+                command, **self.subprocess_kwargs
+            )
+        return await process.wait()
+
+    @staticmethod
+    def _exec_failed(error: OSError) -> int:
+        SGRString(f"{error.filename}: {error.strerror}").print()
+        if isinstance(error, FileNotFoundError):
+            return NOT_FOUND
+        return NOT_EXECUTABLE
+
+    @staticmethod
+    def _command_timeout(recipe: Recipe | None, options: set[str]) -> float | None:
+        for option in options:
+            key, _, value = option.partition("=")
+            if key.strip() == "timeout":
+                return parse_duration(value)
+        if recipe is None or recipe.timeout is None:
+            return None
+        return parse_duration(recipe.timeout)
+
+    def _direct_args(
+        self,
+        command: str,
+        options: set[str],
+        node: Node,
+        session: ShellSession | None,
+    ) -> list[str] | None:
+        args: list[str] | None
+        if "shell" in options:
+            return None
+        if "noshell" in options:
+            args = shlex.split(command)
+        elif session is None and self._recipe_setting(node.recipe, "direct_exec"):
+            args = split_command(command)
+        else:
+            return None
+        if not args:
+            return None
+
+        program = args[0]
+        executable: str | None
+        if os.sep in program:
+            executable = self.base_dir.joinpath(program).as_posix()
+        else:
+            executable = shutil.which(program)
+        if executable is None:
+            return None
+        return [executable, *args[1:]]
 
+    def _report(
+        self,
+        command: str,
+        node: Node,
+        timing: Timing,
+        *,
+        retries: int,
+        status: int,
+        timed_out: bool = False,
+    ) -> None:
         report = CommandReport(
-            command=command, timing=stopwatch.elapsed, retries=i, success=(status == 0)
+            command=command,
+            timing=timing,
+            retries=retries,
+            success=(status == 0),
+            timed_out=timed_out,
         )
         self.reports.append(report)
-        return status
+        self.timings[node.target] = (
+            self.timings.get(node.target, 0) + timing.nanoseconds
+        )
 
     def _check_command(self, check: ExistenceCheck) -> bool:
+        if (known := self._known_check(check)) is not None:
+            return known
+
+        files = self._invalidation_files(check)
+        result = subprocess.run(  # noqa: PLW1510, S603
+            check["command"], capture_output=True, text=True, **self.subprocess_kwargs
+        )
+        return self._checked(
+            check, files, result.returncode, result.stdout, result.stderr
+        )
+
+    async def _acheck_command(self, check: ExistenceCheck) -> bool:
+        if (known := self._known_check(check)) is not None:
+            return known
+
+        files = self._invalidation_files(check)
+        process = await asyncio.create_subprocess_shell(
+            check["command"],
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            **self.subprocess_kwargs,
+        )
+        stdout, stderr = await process.communicate()
+        returncode = cast("int", process.returncode)
+        return self._checked(check, files, returncode, stdout.decode(), stderr.decode())
+
+    def _known_check(self, check: ExistenceCheck) -> bool | None:
         if self.dry_run:
             return True
+        if (cached := self._cached_check(check)) is not None:
+            return self._check_result(check, *cached)
+        return None
 
-        command = check["command"]
-        result = subprocess.run(  # noqa: PLW1510, S603
-            command, capture_output=True, text=True, **self.subprocess_kwargs
+    def _checked(
+        self,
+        check: ExistenceCheck,
+        files: dict[str, JSONType],
+        returncode: int,
+        stdout: str,
+        stderr: str,
+    ) -> bool:
+        self._store_check(check, files, returncode, stdout, stderr)
+        return self._check_result(check, returncode, stdout, stderr)
+
+    def _cached_check(self, check: ExistenceCheck) -> tuple[int, str, str] | None:
+        ttl = check.get("cache_ttl")
+        cached = self.state.get("existence", check["command"])
+        if ttl is None or not isinstance(cached, dict):
+            return None
+        if cast("float", cached["checked_at"]) + parse_duration(ttl) < time():
+            return None
+        if cached["files"] != self._invalidation_files(check):
+            return None
+        return (
+            cast("int", cached["returncode"]),
+            cast("str", cached["stdout"]),
+            cast("str", cached["stderr"]),
+        )
+
+    def _store_check(
+        self,
+        check: ExistenceCheck,
+        files: dict[str, JSONType],
+        returncode: int,
+        stdout: str,
+        stderr: str,
+    ) -> None:
+        if check.get("cache_ttl") is None:
+            return
+        self.state.set(
+            "existence",
+            check["command"],
+            {
+                "checked_at": time(),
+                "files": files,
+                "returncode": returncode,
+                "stdout": stdout,
+                "stderr": stderr,
+            },
         )
+
+    def _invalidation_files(self, check: ExistenceCheck) -> dict[str, JSONType]:
+        files: dict[str, JSONType] = {}
+        for file in check.get("invalidate_on", []):
+            path = self._file_path(file)
+            path_stat = self.stats.stat(path)
+            files[path.as_posix()] = (
+                None if path_stat is None else path_stat.st_mtime_ns
+            )
+        return files
+
+    @staticmethod
+    def _check_result(
+        check: ExistenceCheck, returncode: int, stdout: str, stderr: str
+    ) -> bool:
         expected_stdout = check.get("stdout")
-        if expected_stdout is not None and result.stdout != expected_stdout:
+        if expected_stdout is not None and stdout != expected_stdout:
             return False
         expected_stderr = check.get("stderr")
-        if expected_stderr is not None and result.stderr != expected_stderr:
+        if expected_stderr is not None and stderr != expected_stderr:
             return False
-        return result.returncode == check.get("returncode", 0)
+        return returncode == check.get("returncode", 0)
+
+    def _check_existence(self, dag: DAG) -> dict[str, bool]:
+        checks = self._existence_checks(dag)
+        if not checks:
+            return {}
+        with ThreadPoolExecutor(max_workers=self._check_jobs()) as executor:
+            results = executor.map(self._check_command, checks.values())
+            return dict(zip(checks, results, strict=True))
+
+    async def _acheck_existence(self, dag: DAG) -> dict[str, bool]:
+        checks = self._existence_checks(dag)
+        semaphore = asyncio.Semaphore(self._check_jobs())
+
+        async def check(existence_check: ExistenceCheck) -> bool:
+            async with semaphore:
+                return await self._acheck_command(existence_check)
+
+        results = await asyncio.gather(*map(check, checks.values()))
+        return dict(zip(checks, results, strict=True))
+
+    def _existence_checks(self, dag: DAG) -> dict[str, ExistenceCheck]:
+        return {
+            node.target: node.recipe.existence_check
+            for node in dag
+            if node.recipe is not None
+            and node.recipe.existence_check
+            and node.recipe.phony
+            and node.recipe.exists_only
+            and node.target not in self.up_to_date
+        }
+
+    def _check_jobs(self) -> int:
+        return max(self.jobs, min(MAX_CHECK_JOBS, (os.cpu_count() or 1) + 4))
 
     def _parse_recipes(self, parsed_cookbook: dict[str, RawRecipe]) -> None:
         for target, raw_recipe in parsed_cookbook.items():
@@ -148,6 +690,14 @@ class MakeCommand:
             else:
                 self.static_recipes[cast("str", recipe.target)] = recipe
 
+    def _cacheable(self, parsed_cookbook: dict[str, RawRecipe]) -> bool:
+        names = [
+            [target, raw_recipe.get("alias")]
+            for target, raw_recipe in parsed_cookbook.items()
+        ]
+        text = json.dumps([names, self.globals.get("vars", {})], default=str)
+        return FS_FUNCTION.search(text) is None
+
     def _preprocess_target(self) -> DAG:
         recipe = self._extract_recipe(self.target, use_extra=True)
         if recipe is None:
@@ -167,7 +717,7 @@ class MakeCommand:
                 if recipe is None:
                     requirement_path = self._file_path(raw_requirement)
                     requirement = requirement_path.as_posix()
-                    if not requirement_path.exists():
+                    if not self.stats.exists(requirement_path):
                         msg = f"No recipe to build {requirement}"
                         raise ValueError(msg)
                 else:
@@ -191,10 +741,11 @@ class MakeCommand:
         if self.verbosity > 3:  # noqa: PLR2004
             SGRString("=== all targets ===").print()
             for node in dag:
+                timestamp = human_readable_timestamp(node.timestamp / 1e9)
                 SGROutput(
                     [
                         f"- {node.target}:",
-                        f"    timestamp: {human_readable_timestamp(node.timestamp)}",
+                        f"    timestamp: {timestamp}",
                         f"    should_build: {node.should_build}",
                         f"    requires: {node.requires}",
                         f"    required_by: {node.required_by}",
@@ -209,27 +760,128 @@ class MakeCommand:
             msg = f"No recipe to build {node.target}"
             raise ValueError(msg)
         if recipe.phony and recipe.keep_ts:
-            self.phony_dir.mkdir(exist_ok=True)
-            path.touch()
+            self.state.set("phony", node.target, time_ns())
         if not recipe.phony and recipe.update:
             pathlib.Path(cast("str", recipe.target)).touch()
+        self.stats.invalidate(path)
+
+    def _make_target(self, node: Node) -> int:
+        with self._shell_session(node) as session:
+            steps = self._recipe_steps(node, session)
+            step = self._resume(steps, None)
+            while not isinstance(step, StopIteration):
+                outcome: int | Exception | None = None
+                if isinstance(step, Invocation):
+                    try:
+                        outcome = self._execute(step, session)
+                    except (OSError, subprocess.TimeoutExpired) as error:
+                        outcome = error
+                else:
+                    with self._released(node):
+                        sleep(step)
+                step = self._resume(steps, outcome)
+            return cast("int", step.value)
 
-    def _make_target(self, node: Node) -> None:
+    async def _amake_target(self, node: Node) -> int:
+        with self._shell_session(node) as session:
+            steps = self._recipe_steps(node, session)
+            step = await asyncio.to_thread(self._resume, steps, None)
+            while not isinstance(step, StopIteration):
+                outcome: int | Exception | None = None
+                if isinstance(step, Invocation):
+                    try:
+                        outcome = await self._aexecute(step, session)
+                    except (OSError, subprocess.TimeoutExpired) as error:
+                        outcome = error
+                else:
+                    async with self._areleased(node):
+                        await asyncio.sleep(step)
+                step = await asyncio.to_thread(self._resume, steps, outcome)
+            return cast("int", step.value)
+
+    @staticmethod
+    def _resume(
+        steps: Generator[Invocation | float, int | None, int],
+        outcome: int | Exception | None,
+    ) -> Invocation | float | StopIteration:
+        try:
+            if isinstance(outcome, Exception):
+                return steps.throw(outcome)
+            return steps.send(outcome)
+        except StopIteration as stop:
+            return stop
+
+    def _shell_session(self, node: Node) -> AbstractContextManager[ShellSession | None]:
+        if not PERSISTENT_SHELLS or not self._recipe_setting(
+            node.recipe, "persistent_shell"
+        ):
+            return nullcontext()
+        return ShellSession(
+            self.subprocess_kwargs, process_group=self._has_timeout(node.recipe)
+        )
+
+    def _has_timeout(self, recipe: Recipe | None) -> bool:
+        if recipe is None:
+            return False
+        return recipe.timeout is not None or any(
+            self._command_timeout(None, extract_options(command)[1]) is not None
+            for command in recipe.commands
+        )
+
+    def _recipe_setting(
+        self,
+        recipe: Recipe | None,
+        key: Literal["direct_exec", "persistent_shell", "tree_index"],
+    ) -> bool:
+        if recipe is None:
+            return False
+        value = getattr(recipe, key)
+        if value is None:
+            return bool(self.globals.get(key, False))
+        return bool(value)
+
+    def _recipe_steps(
+        self, node: Node, session: ShellSession | None
+    ) -> Generator[Invocation | float, int | None, int]:
         recipe = node.recipe
         if recipe is None:
             msg = f"No recipe to build {node.target}"
             raise ValueError(msg)
+        if self._requirements_cut_off(node):
+            self.cut_off.add(node)
+            return 0
 
         if self.verbosity > 1:
             SGRString(f"=== target: {recipe.target} ===").print()
+        if recipe.recursive and not self.dry_run:
+            self.state.delete("tree_index", node.target)
+
+        key = self._artifact_key(node)
+        if (
+            key is not None
+            and self.artifacts is not None
+            and self.artifacts.restore(key, self._path(node))
+        ):
+            self._print_restored(node)
+            self._update_ts(node)
+            self._record_build(node)
+            self._check_cut_off(node)
+            return 0
+
+        if self.artifacts is not None and not recipe.phony and not self.dry_run:
+            self.artifacts.detach(self._path(node))
 
         n = len(recipe.commands)
         for i, raw_command in enumerate(recipe.commands):
+            if self.cancelled.is_set():
+                return CANCELLED
             command, options = extract_options(raw_command)
             should_echo = any(self._print_reasons(recipe, options))
             if should_echo:
                 self._print_command(command)
-            return_code = self._run_command(command)
+            return_code = yield from self._command_steps(
+                command, options, node, session
+            )
             if should_echo:
                 self._print_result(command, return_code)
             if (
@@ -237,12 +889,77 @@ class MakeCommand:
                 and not recipe.allow_failures
                 and "allow_failures" not in options
             ):
-                if self.print_timing_report:
-                    print_reports(self.reports)
-                sys.exit(return_code)
+                return return_code
             if i != n - 1:
                 SGRString("").print()
         self._update_ts(node)
+        if not self.dry_run:
+            self.state.set("timings", node.target, self.timings.get(node.target, 0))
+            self._record_build(node)
+            self._check_cut_off(node)
+        if key is not None and self.artifacts is not None:
+            self.artifacts.store(key, self._path(node))
+        return 0
+
+    def _record_build(self, node: Node) -> None:
+        recipe = cast("Recipe", node.recipe)
+        self.state.set("signatures", node.target, recipe.signature())
+        if self.freshness == "hash" and node.requires:
+            self.state.set("inputs", node.target, self._inputs(node))
+
+    def _requirements_cut_off(self, node: Node) -> bool:
+        if not any(child in self.cut_off for child in node.requires):
+            return False
+        should_build, node.timestamp = self._should_build(node)
+        return not should_build
+
+    def _check_cut_off(self, node: Node) -> None:
+        recipe = cast("Recipe", node.recipe)
+        path = self._path(node)
+        if recipe.phony or not recipe.early_cutoff or not self.stats.exists(path):
+            return
+        mtime = self.stats.mtime_ns(path)
+        timestamp = self._logical_timestamp(node, mtime)
+        if timestamp != mtime:
+            node.timestamp = timestamp
+            self.cut_off.add(node)
+
+    def _logical_timestamp(self, node: Node, mtime: int) -> int:
+        recipe = cast("Recipe", node.recipe)
+        if recipe.phony or not recipe.early_cutoff:
+            return mtime
+        digest = self.fingerprints.digest(self._path(node))
+        if digest is None:
+            return mtime
+        stored = self.state.get("outputs", node.target)
+        if isinstance(stored, list) and stored[0] == digest:
+            return cast("int", stored[1])
+        self.state.set("outputs", node.target, [digest, mtime])
+        return mtime
+
+    def _artifact_key(self, node: Node) -> str | None:
+        recipe = node.recipe
+        if self.artifacts is None or self.dry_run or recipe is None or recipe.phony:
+            return None
+        inputs: dict[str, JSONType] = {
+            self._relative(child.target): (
+                ""
+                if child.recipe is not None and child.recipe.phony
+                else self._fingerprint(child)
+            )
+            for child in node.requires
+        }
+        return artifact_key(
+            target=self._relative(node.target),
+            signature=recipe.signature(),
+            inputs=inputs,
+        )
+
+    def _relative(self, target: str) -> str:
+        path = pathlib.Path(target)
+        if not path.is_relative_to(self.base_dir):
+            return target
+        return path.relative_to(self.base_dir).as_posix()
 
     def _extract_recipe(self, target: str, *, use_extra: bool = False) -> Recipe | None:
         if target in self.aliases:
@@ -265,9 +982,27 @@ class MakeCommand:
         return recipe.for_target(target, extra)
 
     def _mark_unchanged(self, dag: DAG) -> None:
+        if not self.force_make:
+            if self.engine == "asyncio":
+                self.existence = asyncio.run(self._acheck_existence(dag))
+            else:
+                self.existence = self._check_existence(dag)
         for node in dag:
             node.should_build, node.timestamp = self._should_build(node)
 
+    def _phony_timestamp(self, target: str) -> int | None:
+        timestamp = self.state.get("phony", target)
+        if timestamp is not None:
+            return cast("int", timestamp)
+
+        path = self._phony_path(target)
+        path_stat = self.stats.stat(path)
+        if path_stat is None:
+            return None
+        self.state.set("phony", target, path_stat.st_mtime_ns)
+        self.legacy_phony.append(path)
+        return path_stat.st_mtime_ns
+
     def _phony_path(self, target: str) -> pathlib.Path:
         encoded_target = target.replace(".", ".46").replace("/", ".47")
         return self.phony_dir.joinpath(encoded_target)
@@ -292,15 +1027,19 @@ class MakeCommand:
             if not recipe.exists_only:
                 msg = "Existence commands need exists_only"
                 raise ValueError(msg)
+            if node.target in self.existence:
+                return self.existence[node.target]
             return self._check_command(recipe.existence_check)
+        if recipe is not None and recipe.phony:
+            return self._phony_timestamp(node.target) is not None
 
-        return path.exists()
+        return self.stats.exists(path)
 
     def _should_build(self, node: Node) -> tuple[bool, float]:
         recipe = node.recipe
         path = self._path(node)
         if recipe is None:
-            return False, path.stat().st_mtime
+            return False, self.stats.mtime_ns(path)
         if self.force_make:
             return True, float("inf")
         if recipe.phony and recipe.target in self.up_to_date:
@@ -311,16 +1050,21 @@ class MakeCommand:
             self._update_ts(node)
             return False, float("inf")
 
-        if not recipe.phony and recipe.recursive:
-            mtime = max(
-                p.stat().st_mtime for p in itertools.chain([path], path.rglob("*"))
-            )
+        if recipe.phony:
+            mtime = cast("int", self._phony_timestamp(node.target))
         else:
-            mtime = path.stat().st_mtime
+            mtime = self.stats.mtime_ns(path)
+        if not recipe.phony and recipe.recursive:
+            stop_at = self._stop_at(node)
+            if stop_at is None or mtime < stop_at:
+                mtime = max(mtime, self._newest_mtime(node, stop_at))
 
         if recipe.exists_only:
             return False, mtime
 
+        return self._is_stale(node, mtime), self._logical_timestamp(node, mtime)
+
+    def _is_stale(self, node: Node, mtime: int) -> bool:
         if not node.requires:
             msg = (
                 "This target already exists and has no requirements. "
@@ -328,11 +1072,80 @@ class MakeCommand:
             )
             raise ValueError(msg)
 
-        if any(child.should_build for child in node.requires):
-            return True, mtime
+        if any(
+            child.should_build and child not in self.cut_off for child in node.requires
+        ):
+            return True
+
+        if self._signature_changed(cast("Recipe", node.recipe)):
+            return True
+
+        if self.freshness == "hash":
+            return self._inputs_changed(node, mtime)
 
         req_ts = max(child.timestamp for child in node.requires)
-        return req_ts > mtime, mtime
+        return req_ts > mtime
+
+    def _newest_mtime(self, node: Node, stop_at: float | None) -> int:
+        recipe = cast("Recipe", node.recipe)
+        path = self._path(node)
+        if not self._recipe_setting(recipe, "tree_index"):
+            return newest_mtime(path, ignore=recipe.ignore, stop_at=stop_at)
+
+        stored = self.state.get("tree_index", node.target)
+        index: dict[str, JSONType] = {}
+        if isinstance(stored, dict) and stored.get("ignore") == recipe.ignore:
+            index = cast("dict[str, JSONType]", stored["directories"])
+        mtime = newest_mtime(path, ignore=recipe.ignore, stop_at=stop_at, index=index)
+        self.state.set(
+            "tree_index",
+            node.target,
+            {"ignore": cast("list[JSONType]", recipe.ignore), "directories": index},
+        )
+        return mtime
+
+    @staticmethod
+    def _stop_at(node: Node) -> float | None:
+        if node.required_by:
+            return None
+        return max((child.timestamp for child in node.requires), default=0)
+
+    def _signature_changed(self, recipe: Recipe) -> bool:
+        target = cast("str", recipe.target)
+        signature = recipe.signature()
+        recorded = self.state.get("signatures", target)
+        if recorded is None:
+            self.state.set("signatures", target, signature)
+            return False
+        return recorded != signature
+
+    def _inputs_changed(self, node: Node, mtime: float) -> bool:
+        inputs = self._inputs(node)
+        recorded = self.state.get("inputs", node.target)
+        if recorded is not None:
+            return recorded != inputs
+
+        changed = max(child.timestamp for child in node.requires) > mtime
+        if not changed:
+            self.state.set("inputs", node.target, inputs)
+        return changed
+
+    def _inputs(self, node: Node) -> dict[str, JSONType]:
+        return {child.target: self._fingerprint(child) for child in node.requires}
+
+    def _fingerprint(self, node: Node) -> str:
+        path = self._path(node)
+        if node.recipe is not None and node.recipe.phony:
+            timestamp = self._phony_timestamp(node.target)
+            return "" if timestamp is None else str(timestamp)
+        path_stat = self.stats.stat(path)
+        if path_stat is None:
+            return ""
+        if stat.S_ISDIR(path_stat.st_mode):
+            ignore = [] if node.recipe is None else node.recipe.ignore
+            return self.fingerprints.tree_digest(path, ignore=ignore)
+        digest = self.fingerprints.digest(path)
+        return str(path_stat.st_mtime_ns) if digest is None else digest
 
     def _print_reasons(self, recipe: Recipe, options: set[str]) -> Iterator[bool]:
         yield "echo" in options
@@ -356,6 +1169,65 @@ class MakeCommand:
             [prefix, "`", SGRString(command, params=[SGRCodes.BOLD]), "`", suffix]
         ).print()
 
+    def _print_restored(self, node: Node) -> None:
+        SGROutput(
+            [
+                "♻️ ",
+                "`",
+                SGRString(node.target, params=[SGRCodes.BOLD]),
+                "` restored from the artifact cache",
+            ]
+        ).print()
+
+    def _print_summary(self, failed: list[Node], skipped: list[Node]) -> None:
+        SGRString("Yam Summary", params=[SGRCodes.BOLD]).header(padding="=")
+        for node in failed:
+            SGROutput(
+                ["❌ ", "`", SGRString(node.target, params=[SGRCodes.BOLD]), "` failed"]
+            ).print()
+        for node in skipped:
+            SGROutput(
+                [
+                    "⏭️ ",
+                    "`",
+                    SGRString(node.target, params=[SGRCodes.BOLD]),
+                    "` skipped because a requirement failed",
+                ]
+            ).print()
+
+    def _get_pools(self) -> dict[str, int]:
+        pools: dict[str, int] = self.globals.get("pools", {})
+        for pool, capacity in pools.items():
+            if not isinstance(capacity, int) or capacity < 1:
+                msg = f"The capacity of the pool {pool} must be a positive integer"
+                raise ValueError(msg)
+        return pools
+
+    def _get_artifacts(self) -> ArtifactCache | None:
+        config = self.globals.get("artifact_cache")
+        if config is None:
+            return None
+        if isinstance(config, str):
+            config = {"path": config}
+        max_size = config.get("max_size")
+        if isinstance(max_size, str):
+            max_size = parse_size(max_size)
+        directory = pathlib.Path(config["path"]).expanduser()
+        remote = config.get("remote")
+        return ArtifactCache(
+            self.base_dir.joinpath(directory),
+            max_size=max_size,
+            hardlink=config.get("hardlink", False),
+            remote=None if remote is None else get_backend(remote, self.base_dir),
+        )
+
+    def _get_freshness(self) -> Literal["mtime", "hash"]:
+        freshness = self.globals.get("freshness", "mtime")
+        if freshness not in {"mtime", "hash"}:
+            msg = f"{freshness} is not a valid freshness, use mtime or hash"
+            raise ValueError(msg)
+        return cast("Literal['mtime', 'hash']", freshness)
+
     def _get_version(self) -> Version:
         try:
             version_str = self.globals["version"]
@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+import hashlib
+import http.client
+import json
+import os
+import shutil
+import stat
+import sys
+import tarfile
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, suppress
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Protocol
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from yamk.lib.type_defs import JSONType
+
+FICLONE = 0x40049409
+LOCK_NAME = ".lock"
+TMP_NAME = ".tmp"
+HTTP_TIMEOUT = 30.0
+UPLOAD_WORKERS = 4
+
+
+if sys.platform == "win32":
+
+    def reflink(source: IO[bytes], destination: IO[bytes]) -> bool:  # noqa: ARG001
+        return False
+
+else:
+    import fcntl
+
+    def reflink(source: IO[bytes], destination: IO[bytes]) -> bool:
+        try:
+            fcntl.ioctl(destination.fileno(), FICLONE, source.fileno())
+        except OSError:
+            return False
+        return True
+
+
+def artifact_key(**parts: JSONType) -> str:
+    encoded = json.dumps(parts, sort_keys=True).encode()
+    return hashlib.blake2b(encoded, digest_size=32).hexdigest()
+
+
+class Backend(Protocol):
+    def download(self, key: str, file: IO[bytes]) -> bool: ...
+
+    def upload(self, key: str, file: IO[bytes]) -> None: ...
+
+
+class DirectoryBackend:
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+
+    def download(self, key: str, file: IO[bytes]) -> bool:
+        try:
+            with self.directory.joinpath(key).open("rb") as remote:
+                shutil.copyfileobj(remote, file)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def upload(self, key: str, file: IO[bytes]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            dir=self.directory, prefix=f".{key}.", delete=False
+        ) as remote:
+            shutil.copyfileobj(file, remote)
+        Path(remote.name).replace(self.directory.joinpath(key))
+
+
+class HttpBackend:
+    def __init__(self, url: str) -> None:
+        self.url = url.rstrip("/")
+
+    def download(self, key: str, file: IO[bytes]) -> bool:
+        try:
+            with urllib.request.urlopen(  # noqa: S310
+                f"{self.url}/{key}", timeout=HTTP_TIMEOUT
+            ) as response:
+                shutil.copyfileobj(response, file)
+        except urllib.error.HTTPError as exc:
+            if exc.code == 404:  # noqa: PLR2004
+                return False
+            raise
+        return True
+
+    def upload(self, key: str, file: IO[bytes]) -> None:
+        size = os.fstat(file.fileno()).st_size
+        request = urllib.request.Request(  # noqa: S310
+            f"{self.url}/{key}",
+            data=file,
+            headers={"Content-Length": str(size)},
+            method="PUT",
+        )
+        with urllib.request.urlopen(request, timeout=HTTP_TIMEOUT):  # noqa: S310
+            pass
+
+
+def get_backend(location: str, base_dir: Path) -> Backend:
+    if location.startswith(("http://", "https://")):
+        return HttpBackend(location)
+    return DirectoryBackend(base_dir.joinpath(Path(location).expanduser()))
+
+
+class ArtifactCache:
+    def __init__(
+        self,
+        directory: Path,
+        *,
+        max_size: int | None = None,
+        hardlink: bool = False,
+        remote: Backend | None = None,
+    ) -> None:
+        self.directory = directory
+        self.max_size = max_size
+        self.hardlink = hardlink
+        self.remote = remote
+        self._uploads: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def restore(self, key: str, path: Path) -> bool:
+        entry = self._entry(key)
+        if not entry.exists() and not self._download(key):
+            return False
+
+        temp = path.with_name(f".{path.name}.yamk-{os.getpid()}")
+        try:
+            self._copy(entry, temp, link=self.hardlink)
+            self._replace(temp, path)
+        except OSError:
+            self._remove(temp)
+            return False
+        with suppress(OSError):
+            os.utime(entry)
+        os.utime(path)
+        return True
+
+    def store(self, key: str, path: Path) -> None:
+        entry = self._entry(key)
+        if entry.exists():
+            with suppress(OSError):
+                os.utime(entry)
+            return
+
+        with self._staging() as staging:
+            if staging is None:
+                return
+            try:
+                self._copy(path, staging.joinpath(key), link=False)
+                self._add(key, staging.joinpath(key))
+            except OSError:
+                return
+        self._evict()
+        if self.remote is not None:
+            with self._lock:
+                if self._uploads is None:
+                    self._uploads = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS)
+                self._uploads.submit(self._upload, key)
+
+    def detach(self, path: Path) -> None:
+        if not self.hardlink:
+            return
+        try:
+            device = self.directory.stat().st_dev
+            files = path.rglob("*") if path.is_dir() else [path]
+            for file in files:
+                info = file.lstat()
+                if (
+                    stat.S_ISREG(info.st_mode)
+                    and info.st_nlink > 1
+                    and info.st_dev == device
+                ):
+                    temp = file.with_name(f".{file.name}.yamk-{os.getpid()}")
+                    self._copy_file(file, temp, link=False)
+                    temp.replace(file)
+        except OSError:
+            return
+
+    def wait(self) -> None:
+        with self._lock:
+            uploads, self._uploads = self._uploads, None
+        if uploads is not None:
+            uploads.shutdown()
+
+    def _download(self, key: str) -> bool:
+        if self.remote is None:
+            return False
+        with self._staging() as staging:
+            if staging is None:
+                return False
+            archive = staging.joinpath("archive.tar")
+            try:
+                with archive.open("wb") as file:
+                    if not self.remote.download(key, file):
+                        return False
+                with tarfile.open(archive) as tar:
+                    tar.extractall(staging, filter="data")
+                self._add(key, staging.joinpath(key))
+            except (OSError, ValueError, http.client.HTTPException, tarfile.TarError):
+                return False
+        self._evict()
+        return True
+
+    def _upload(self, key: str) -> None:
+        if self.remote is None:
+            return
+        with tempfile.TemporaryFile() as file:
+            try:
+                with tarfile.open(fileobj=file, mode="w") as tar:
+                    tar.add(self._entry(key), arcname=key)
+                file.seek(0)
+                self.remote.upload(key, file)
+            except (OSError, ValueError, http.client.HTTPException, tarfile.TarError):
+                return
+
+    @contextmanager
+    def _staging(self) -> Iterator[Path | None]:
+        try:
+            temp_dir = self.directory.joinpath(TMP_NAME)
+            temp_dir.mkdir(parents=True, exist_ok=True)
+            staging = Path(tempfile.mkdtemp(dir=temp_dir))
+        except OSError:
+            yield None
+            return
+        try:
+            yield staging
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def _add(self, key: str, path: Path) -> None:
+        entry = self._entry(key)
+        entry.parent.mkdir(exist_ok=True)
+        self._replace(path, entry)
+        os.utime(entry)
+
+    def _entry(self, key: str) -> Path:
+        return self.directory.joinpath(key[:2], key)
+
+    def _evict(self) -> None:
+        if self.max_size is not None:
+            with suppress(OSError):
+                self._evict_to(self.max_size)
+
+    def _evict_to(self, max_size: int) -> None:
+        lock = self.directory.joinpath(LOCK_NAME)
+        with lock.open("a") as file:
+            if sys.platform != "win32":
+                fcntl.flock(file, fcntl.LOCK_EX)
+            entries = []
+            for bucket in self.directory.iterdir():
+                if bucket.name.startswith(".") or not bucket.is_dir():
+                    continue
+                for entry in bucket.iterdir():
+                    with suppress(OSError):
+                        entries.append(
+                            (entry.stat().st_mtime_ns, self._size(entry), entry)
+                        )
+            total = sum(size for _, size, _ in entries)
+            for _, size, entry in sorted(entries, key=lambda item: item[0]):
+                if total <= max_size:
+                    break
+                self._remove(entry)
+                total -= size
+
+    @classmethod
+    def _copy(cls, source: Path, destination: Path, *, link: bool) -> None:
+        if source.is_dir():
+            shutil.copytree(
+                source,
+                destination,
+                symlinks=True,
+                copy_function=lambda src, dst: cls._copy_file(src, dst, link=link),
+            )
+        else:
+            cls._copy_file(source, destination, link=link)
+
+    @staticmethod
+    def _copy_file(source: str | Path, destination: str | Path, *, link: bool) -> None:
+        if link:
+            with suppress(OSError):
+                os.link(source, destination)
+                return
+        with open(source, "rb") as src, open(destination, "wb") as dst:  # noqa: PTH123
+            if not reflink(src, dst):
+                shutil.copyfileobj(src, dst)
+        shutil.copystat(source, destination)
+
+    @classmethod
+    def _replace(cls, source: Path, destination: Path) -> None:
+        if destination.is_dir() and not destination.is_symlink():
+            cls._remove(destination)
+        source.replace(destination)
+
+    @staticmethod
+    def _remove(path: Path) -> None:
+        if path.is_dir() and not path.is_symlink():
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _size(path: Path) -> int:
+        if not path.is_dir():
+            return path.stat().st_size
+        return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
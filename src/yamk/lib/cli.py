@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import os
 import sys
 from argparse import REMAINDER, ArgumentParser, BooleanOptionalAction
 from dataclasses import dataclass
@@ -7,7 +8,7 @@ from pathlib import Path
 from typing import TYPE_CHECKING, Literal, Self
 
 from yamk.__version__ import __version__
-from yamk.lib.utils import SUPPORTED_FILE_EXTENSIONS
+from yamk.lib.utils import SUPPORTED_FILE_EXTENSIONS, parse_size
 
 if TYPE_CHECKING:
     from argparse import Namespace
@@ -20,17 +21,26 @@ class CliArgs:
     bare: bool
     cookbook: Path
     cookbook_type: Literal["json", "yaml", "toml"] | None
+    daemon: bool
     dry_run: bool
     echo_override: bool
+    engine: Literal["subprocess", "asyncio"]
     extra: list[str]
     force_make: bool
+    jobs: int
+    jobserver_style: Literal["pipe", "fifo"]
+    keep_going: bool
+    max_load: float | None
+    min_free_memory: int | None
     print_timing_report: bool
     retries: int
+    schedule: Literal["c3", "critical-path"]
     shell: str | None
     target: str
     up_to_date: list[str]
     variables: dict[str, str]
     verbosity: int
+    watch: bool
 
     @classmethod
     def from_args(cls, args: Namespace) -> Self:
@@ -80,7 +90,7 @@ def parse_args() -> CliArgs:
         help="increase the level of verbosity",
     )
 
-    parser.add_argument("target", help="the target for yam")
+    parser.add_argument("target", nargs="?", default="", help="the target for yam")
 
     parser.add_argument(
         "-a",
@@ -103,6 +113,11 @@ def parse_args() -> CliArgs:
         metavar="cookbook",
         help="the path to the cookbook",
     )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="keep serving builds of the cookbook from a background process",
+    )
     parser.add_argument(
         "-d",
         "--directory",
@@ -117,6 +132,12 @@ def parse_args() -> CliArgs:
         dest="echo_override",
         help="a boolean flag to enable or disable the echo of the commands",
     )
+    parser.add_argument(
+        "--engine",
+        choices=["subprocess", "asyncio"],
+        default="subprocess",
+        help="the engine used to run the commands",
+    )
     parser.add_argument(
         "-f",
         "--force",
@@ -124,6 +145,43 @@ def parse_args() -> CliArgs:
         dest="force_make",
         help="rebuild all dependencies and the target",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        metavar="jobs",
+        nargs="?",
+        const="",
+        default="1",
+        help="run up to <jobs> targets in parallel (defaults to the number of CPUs)",
+    )
+    parser.add_argument(
+        "--jobserver-style",
+        choices=["pipe", "fifo"],
+        default="pipe",
+        help="the kind of jobserver to share the jobs with nested builds",
+    )
+    parser.add_argument(
+        "-k",
+        "--keep-going",
+        action="store_true",
+        help="keep building the targets that don't depend on a failed one",
+    )
+    parser.add_argument(
+        "-l",
+        "--max-load",
+        metavar="load",
+        type=float,
+        help="do not start new jobs while other jobs run and the load average "
+        "is at least <load>",
+    )
+    parser.add_argument(
+        "--min-free-mem",
+        metavar="size",
+        type=parse_size,
+        dest="min_free_memory",
+        help="do not start new jobs while other jobs run and the available memory "
+        "is less than <size> (e.g. 512M, 2G)",
+    )
     parser.add_argument(
         "-n",
         "--dry-run",
@@ -138,6 +196,12 @@ def parse_args() -> CliArgs:
         default=0,
         help="retry commands for <retries> number of times",
     )
+    parser.add_argument(
+        "--schedule",
+        choices=["c3", "critical-path"],
+        default="c3",
+        help="the order in which targets that are ready are started",
+    )
     parser.add_argument(
         "-s",
         "--shell",
@@ -157,6 +221,12 @@ def parse_args() -> CliArgs:
         dest="print_timing_report",
         help="print a timing report",
     )
+    parser.add_argument(
+        "-w",
+        "--watch",
+        action="store_true",
+        help="keep rebuilding the target whenever the files it depends on change",
+    )
     parser.add_argument(
         "-x",
         "--variable",
@@ -175,6 +245,16 @@ def parse_args() -> CliArgs:
     )
 
     args = parser.parse_args()
+    try:
+        args.jobs = int(args.jobs or os.cpu_count() or 1)
+    except ValueError:
+        if args.target:
+            args.extra.insert(0, args.target)
+        args.target, args.jobs = args.jobs, os.cpu_count() or 1
+    if not args.target and not args.daemon:
+        parser.error("the following arguments are required: target")
+    if args.jobs < 1:
+        parser.error("the number of jobs must be a positive integer")
     if args.verbosity > 0:
         sys.tracebacklimit = 1000
 
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import copy
+import marshal
+import tempfile
+from pathlib import Path
+from typing import Any, Literal
+
+from dj_settings import ConfigParser
+
+from yamk.__version__ import __version__
+
+Signature = tuple[tuple[str, int, int], ...]
+RawCookbook = dict[str, Any]  # type: ignore[explicit-any]
+CacheKey = tuple[str, str | None, Signature]
+
+COOKBOOKS: dict[tuple[Path, str | None], tuple[Signature, RawCookbook]] = {}
+CACHE_DIR = ".yamk"
+
+
+def load_cookbook(
+    cookbook: Path, cookbook_type: Literal["json", "yaml", "toml"] | None
+) -> RawCookbook:
+    key = (cookbook, cookbook_type)
+    signature = cookbook_signature(cookbook)
+    cached = COOKBOOKS.get(key)
+    if cached is None or cached[0] != signature:
+        cache_key = (__version__, cookbook_type, signature)
+        data = read_cache(cookbook, cache_key)
+        if data is None:
+            data = ConfigParser([cookbook], force_type=cookbook_type).data
+            write_cache(cookbook, cache_key, data)
+        cached = COOKBOOKS[key] = (signature, data)
+    return copy.deepcopy(cached[1])
+
+
+def cache_path(cookbook: Path) -> Path:
+    return cookbook.parent.joinpath(CACHE_DIR, f"{cookbook.name}.marshal")
+
+
+def read_cache(cookbook: Path, key: CacheKey) -> RawCookbook | None:
+    try:
+        with cache_path(cookbook).open("rb") as file:
+            cached_key, data = marshal.load(file)  # noqa: S302
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if cached_key != key or not isinstance(data, dict):
+        return None
+    return data
+
+
+def write_cache(cookbook: Path, key: CacheKey, data: RawCookbook) -> None:
+    path = cache_path(cookbook)
+    try:
+        encoded = marshal.dumps((key, data))
+        path.parent.mkdir(exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            dir=path.parent, prefix=f".{path.name}.", delete=False
+        ) as file:
+            file.write(encoded)
+        Path(file.name).replace(path)
+    except (OSError, ValueError):
+        return
+
+
+def cookbook_signature(cookbook: Path) -> Signature:
+    override_dir = cookbook.with_suffix(f"{cookbook.suffix}.d")
+    paths = [cookbook, override_dir]
+    if override_dir.is_dir():
+        paths.extend(sorted(override_dir.iterdir()))
+
+    signature = []
+    for path in paths:
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        signature.append((path.as_posix(), stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import json
+import os
+import signal
+import socket
+import sys
+import traceback
+import warnings
+from contextlib import suppress
+from dataclasses import asdict
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from yamk.lib.cli import CliArgs
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from types import FrameType
+
+SOCKET_NAME = "daemon.sock"
+STD_FDS = (0, 1, 2)
+BUFFER_SIZE = 65536
+
+
+def socket_path(cookbook: Path) -> Path:
+    return cookbook.parent.joinpath(".yamk", SOCKET_NAME)
+
+
+if sys.platform == "win32":
+
+    def request(args: CliArgs) -> int | None:  # noqa: ARG001
+        return None
+
+    class Daemon:
+        def __init__(
+            self,
+            cookbook: Path,
+            build: Callable[[CliArgs], None],
+            warm: Callable[[CliArgs], object],
+        ) -> None:
+            self.cookbook = cookbook
+            self.build = build
+            self.warm = warm
+
+        def serve(self) -> None:
+            msg = "The daemon is only supported on POSIX systems"
+            raise RuntimeError(msg)
+
+else:
+
+    def request(args: CliArgs) -> int | None:
+        path = socket_path(args.cookbook)
+        if not path.is_socket():
+            return None
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            try:
+                client.connect(os.fspath(path))
+            except OSError:
+                return None
+
+            payload = {
+                "args": {**asdict(args), "cookbook": args.cookbook.as_posix()},
+                "cwd": Path.cwd().as_posix(),
+                "env": dict(os.environ),
+            }
+            socket.send_fds(client, [b"\0"], list(STD_FDS))
+            client.sendall(json.dumps(payload).encode())
+            client.shutdown(socket.SHUT_WR)
+            response = client.makefile("rb")
+            if not (pid := response.readline()):
+                return None
+            try:
+                status = response.read()
+            except KeyboardInterrupt:
+                os.kill(int(pid), signal.SIGINT)
+                status = response.read()
+        return int(status or 1)
+
+    class Daemon:
+        def __init__(
+            self,
+            cookbook: Path,
+            build: Callable[[CliArgs], None],
+            warm: Callable[[CliArgs], object],
+        ) -> None:
+            self.cookbook = cookbook
+            self.build = build
+            self.warm = warm
+            self.path = socket_path(cookbook)
+
+        def serve(self) -> None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.unlink(missing_ok=True)
+            signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+            signal.signal(signal.SIGTERM, self._stop)
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+                pending = self.path.with_name(f".{self.path.name}.{os.getpid()}")
+                server.bind(os.fspath(pending))
+                server.listen()
+                pending.replace(self.path)
+                try:
+                    while True:
+                        connection, _ = server.accept()
+                        with connection:
+                            self._handle(connection)
+                finally:
+                    self.path.unlink(missing_ok=True)
+
+        def _handle(self, connection: socket.socket) -> None:
+            _, fds, _, _ = socket.recv_fds(connection, 1, len(STD_FDS))
+            payload = json.loads(
+                b"".join(iter(partial(connection.recv, BUFFER_SIZE), b""))
+            )
+            args = CliArgs(
+                **{**payload["args"], "cookbook": Path(payload["args"]["cookbook"])}
+            )
+            self._warm(args, payload["env"])
+            if os.fork():
+                for fd in fds:
+                    os.close(fd)
+                return
+
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            for fd, std_fd in zip(fds, STD_FDS, strict=True):
+                os.dup2(fd, std_fd)
+                os.close(fd)
+            os.chdir(payload["cwd"])
+            os.environ.clear()
+            os.environ.update(payload["env"])
+            connection.sendall(f"{os.getpid()}\n".encode())
+            status = self._run(args)
+            connection.sendall(str(status).encode())
+            os._exit(0)
+
+        def _run(self, args: CliArgs) -> int:
+            try:
+                self.build(args)
+            except SystemExit as exc:
+                if exc.code is None or isinstance(exc.code, int):
+                    return exc.code or 0
+                sys.stderr.write(f"{exc.code}\n")
+                return 1
+            except KeyboardInterrupt:
+                return 128 + signal.SIGINT
+            except Exception:  # noqa: BLE001
+                traceback.print_exc()
+                return 1
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+            return 0
+
+        @staticmethod
+        def _stop(signum: int, _frame: FrameType | None) -> None:
+            sys.exit(128 + signum)
+
+        def _warm(self, args: CliArgs, env: dict[str, str]) -> None:
+            environ = dict(os.environ)
+            os.environ.clear()
+            os.environ.update(env)
+            try:
+                with suppress(Exception), warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    self.warm(args)
+            finally:
+                os.environ.clear()
+                os.environ.update(environ)
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import errno
+import fnmatch
+import hashlib
+import os
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, cast
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+    from pathlib import Path
+
+    from yamk.lib.state import State
+    from yamk.lib.type_defs import JSONType
+
+FINGERPRINTS = "fingerprints"
+DIGEST = "blake2b"
+
+
+class StatCache:
+    def __init__(self) -> None:
+        self._stats: dict[str, os.stat_result | None] = {}
+
+    def stat(self, path: Path) -> os.stat_result | None:
+        key = path.as_posix()
+        try:
+            return self._stats[key]
+        except KeyError:
+            pass
+        try:
+            result: os.stat_result | None = path.stat()
+        except OSError:
+            result = None
+        self._stats[key] = result
+        return result
+
+    def exists(self, path: Path) -> bool:
+        return self.stat(path) is not None
+
+    def mtime_ns(self, path: Path) -> int:
+        result = self.stat(path)
+        if result is None:
+            raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+        return result.st_mtime_ns
+
+    def invalidate(self, path: Path) -> None:
+        key = path.as_posix()
+        prefix = f"{key}/"
+        self._stats.pop(key, None)
+        for cached in list(self._stats):
+            if cached.startswith(prefix):
+                self._stats.pop(cached, None)
+
+    def clear(self) -> None:
+        self._stats.clear()
+
+
+def newest_mtime(
+    path: Path,
+    *,
+    ignore: Sequence[str] = (),
+    stop_at: float | None = None,
+    index: dict[str, JSONType] | None = None,
+) -> int:
+    return TreeWalker(ignore=ignore, stop_at=stop_at, index=index).newest(path)
+
+
+class TreeWalker:
+    def __init__(
+        self,
+        *,
+        ignore: Sequence[str],
+        stop_at: float | None,
+        index: dict[str, JSONType] | None,
+    ) -> None:
+        self.ignore = ignore
+        self.stop_at = stop_at
+        self.index = index
+        self._found = threading.Event()
+
+    def newest(self, path: Path) -> int:
+        newest, directories = self._scan(path.as_posix())
+        if directories and not self._found.is_set():
+            with ThreadPoolExecutor() as executor:
+                newest = max(newest, *executor.map(self._walk, directories))
+        return newest
+
+    def _walk(self, directory: str) -> int:
+        newest = 0
+        unvisited = [directory]
+        while unvisited and not self._found.is_set():
+            mtime, directories = self._scan(unvisited.pop())
+            newest = max(newest, mtime)
+            unvisited.extend(directories)
+        return newest
+
+    def _scan(self, directory: str) -> tuple[int, list[str]]:
+        if self.index is None:
+            return self._scan_entries(directory, include_directories=True)
+
+        try:
+            directory_mtime = os.stat(directory).st_mtime_ns  # noqa: PTH116
+        except OSError:
+            return 0, []
+        cached = self.index.get(directory)
+        if isinstance(cached, list) and cached[0] == directory_mtime:
+            newest, names = cast("tuple[int, list[str]]", cached[1:])
+            directories = [os.path.join(directory, name) for name in names]  # noqa: PTH118
+        else:
+            newest, directories = self._scan_entries(
+                directory, include_directories=False
+            )
+            if not self._found.is_set():
+                subdirectories: list[JSONType] = [
+                    os.path.basename(path)  # noqa: PTH119
+                    for path in directories
+                ]
+                self.index[directory] = [directory_mtime, newest, subdirectories]
+        newest = max(newest, directory_mtime)
+        self._check(newest)
+        return newest, directories
+
+    def _scan_entries(
+        self, directory: str, *, include_directories: bool
+    ) -> tuple[int, list[str]]:
+        newest = 0
+        directories = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if ignored(entry.name, self.ignore):
+                        continue
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        if is_dir and not include_directories:
+                            directories.append(entry.path)
+                            continue
+                        mtime = entry.stat().st_mtime_ns
+                    except OSError:
+                        continue
+                    newest = max(newest, mtime)
+                    if self._check(mtime):
+                        break
+                    if is_dir:
+                        directories.append(entry.path)
+        except OSError:
+            pass
+        return newest, directories
+
+    def _check(self, mtime: int) -> bool:
+        if self.stop_at is not None and mtime >= self.stop_at:
+            self._found.set()
+        return self._found.is_set()
+
+
+class Fingerprints:
+    def __init__(self, state: State, stats: StatCache) -> None:
+        self.state = state
+        self.stats = stats
+
+    def digest(self, path: Path) -> str | None:
+        path_stat = self.stats.stat(path)
+        if path_stat is None or not stat.S_ISREG(path_stat.st_mode):
+            return None
+
+        key = path.as_posix()
+        fingerprint = [path_stat.st_size, path_stat.st_mtime_ns]
+        stored = self.state.get(FINGERPRINTS, key)
+        if isinstance(stored, list) and stored[:2] == fingerprint:
+            return str(stored[2])
+
+        with path.open("rb") as file:
+            digest = hashlib.file_digest(file, DIGEST).hexdigest()
+        self.state.set(FINGERPRINTS, key, [*fingerprint, digest])
+        return digest
+
+    def tree_digest(self, path: Path, *, ignore: Sequence[str] = ()) -> str:
+        tree = hashlib.new(DIGEST)
+        for root, directories, files in os.walk(path):
+            directories[:] = sorted(
+                name for name in directories if not ignored(name, ignore)
+            )
+            relative_root = os.path.relpath(root, path)
+            for name in directories:
+                tree.update(f"{relative_root}/{name}/\0".encode())
+            for name in sorted(files):
+                if ignored(name, ignore):
+                    continue
+                file = path.joinpath(relative_root, name)
+                digest = self.digest(file) or ""
+                tree.update(f"{relative_root}/{name}\0{digest}\0".encode())
+        return tree.hexdigest()
+
+
+def ignored(name: str, ignore: Sequence[str]) -> bool:
+    return any(fnmatch.fnmatch(name, glob) for glob in ignore)
+
+
+stats = StatCache()
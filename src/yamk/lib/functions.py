@@ -3,6 +3,8 @@ from __future__ import annotations
 from functools import reduce
 from typing import TYPE_CHECKING, Any, Generic, TypeVar, cast
 
+from yamk.lib.fs import stats
+
 if TYPE_CHECKING:
     from collections.abc import Iterable
     from pathlib import Path
@@ -43,7 +45,7 @@ class Exists(Function):
     def __call__(self, path: Pathlike | list[Pathlike]) -> bool | list[bool]:
         if isinstance(path, list):
             return [cast("bool", self(file)) for file in path]
-        return self.base_dir.joinpath(path).exists()
+        return stats.exists(self.base_dir.joinpath(path))
 
 
 class Name(Function):
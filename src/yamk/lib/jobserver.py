@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import os
+import re
+import shutil
+import stat
+import sys
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING, Literal, Self
+
+if TYPE_CHECKING:
+    from types import TracebackType
+
+AUTH = re.compile(r"--jobserver-(?:auth|fds)=(?:fifo:(?P<path>\S+)|(?P<fds>\d+,\d+))")
+JOBS = re.compile(r"(?:^|\s)-j(?P<jobs>\d+)")
+TOKEN = b"+"
+
+
+if sys.platform == "win32":
+
+    def open_pipe() -> tuple[int, int] | None:
+        return None
+
+    def nonblocking(fd: int) -> int:
+        return os.dup(fd)
+
+    def open_fifo(path: Path, *, create: bool = False) -> int | None:  # noqa: ARG001
+        return None
+
+else:
+
+    def open_pipe() -> tuple[int, int] | None:
+        try:
+            read_fd, write_fd = os.pipe()
+        except OSError:
+            return None
+        os.set_inheritable(read_fd, True)  # noqa: FBT003
+        os.set_inheritable(write_fd, True)  # noqa: FBT003
+        return read_fd, write_fd
+
+    def nonblocking(fd: int) -> int:
+        duplicate = os.dup(fd)
+        os.set_blocking(duplicate, False)
+        return duplicate
+
+    def open_fifo(path: Path, *, create: bool = False) -> int | None:
+        try:
+            if create:
+                os.mkfifo(path, 0o600)
+            return os.open(path, os.O_RDWR | os.O_NONBLOCK)
+        except OSError:
+            return None
+
+
+class Jobserver:
+    def __init__(
+        self,
+        read_fd: int,
+        write_fd: int,
+        *,
+        jobs: int,
+        makeflags: str,
+        pass_fds: tuple[int, ...] = (),
+        owned: bool = False,
+        directory: Path | None = None,
+    ) -> None:
+        self.read_fd = read_fd
+        self.write_fd = write_fd
+        self.jobs = jobs
+        self.makeflags = makeflags
+        self.pass_fds = pass_fds
+        self.tokens: list[bytes] = []
+        self._owned = owned
+        self._reader = nonblocking(read_fd)
+        self._directory = directory
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    @classmethod
+    def create(
+        cls, jobs: int, *, style: Literal["pipe", "fifo"] = "pipe"
+    ) -> Self | None:
+        if style == "fifo":
+            return cls._create_fifo(jobs)
+        if (fds := open_pipe()) is None:
+            return None
+        read_fd, write_fd = fds
+        os.write(write_fd, TOKEN * (jobs - 1))
+        auth = f"{read_fd},{write_fd}"
+        makeflags = os.environ.get("MAKEFLAGS", "")
+        makeflags = (
+            f"{makeflags} -j{jobs} --jobserver-fds={auth} --jobserver-auth={auth}"
+        )
+        return cls(
+            read_fd,
+            write_fd,
+            jobs=jobs,
+            makeflags=makeflags.strip(),
+            pass_fds=fds,
+            owned=True,
+        )
+
+    @classmethod
+    def _create_fifo(cls, jobs: int) -> Self | None:
+        directory = Path(tempfile.mkdtemp(prefix="yamk-"))
+        path = directory.joinpath("jobserver")
+        fd = open_fifo(path, create=True)
+        if fd is None:
+            shutil.rmtree(directory, ignore_errors=True)
+            return None
+        os.write(fd, TOKEN * (jobs - 1))
+        makeflags = os.environ.get("MAKEFLAGS", "")
+        makeflags = f"{makeflags} -j{jobs} --jobserver-auth=fifo:{path}".strip()
+        return cls(
+            fd, fd, jobs=jobs, makeflags=makeflags, owned=True, directory=directory
+        )
+
+    @classmethod
+    def from_makeflags(cls, makeflags: str) -> Self | None:
+        matches = list(AUTH.finditer(makeflags))
+        if not matches:
+            return None
+
+        auth = matches[-1]
+        jobs = [int(match["jobs"]) for match in JOBS.finditer(makeflags)]
+        pass_fds: tuple[int, ...] = ()
+        owned = bool(auth["path"])
+        if auth["path"]:
+            fd = open_fifo(Path(auth["path"]))
+            if fd is None:
+                return None
+            read_fd = write_fd = fd
+        else:
+            read_fd, write_fd = (int(fd) for fd in auth["fds"].split(","))
+            pass_fds = (read_fd, write_fd)
+            if not all(cls._is_pipe(fd) for fd in pass_fds):
+                return None
+        return cls(
+            read_fd,
+            write_fd,
+            jobs=jobs[-1] if jobs else os.cpu_count() or 1,
+            makeflags=makeflags,
+            pass_fds=pass_fds,
+            owned=owned,
+        )
+
+    def acquire(self) -> bool:
+        try:
+            token = os.read(self._reader, 1)
+        except BlockingIOError:
+            return False
+        if not token:
+            return False
+        self.tokens.append(token)
+        return True
+
+    def release(self) -> None:
+        os.write(self.write_fd, self.tokens.pop())
+
+    def close(self) -> None:
+        while self.tokens:
+            self.release()
+        os.close(self._reader)
+        if self._owned:
+            os.close(self.read_fd)
+            if self.write_fd != self.read_fd:
+                os.close(self.write_fd)
+        if self._directory is not None:
+            shutil.rmtree(self._directory, ignore_errors=True)
+
+    @staticmethod
+    def _is_pipe(fd: int) -> bool:
+        try:
+            return stat.S_ISFIFO(os.fstat(fd).st_mode)
+        except OSError:
+            return False
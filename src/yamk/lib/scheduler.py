@@ -0,0 +1,326 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import os
+import sys
+import threading
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Literal, TypeVar
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Awaitable, Callable, Iterator, Mapping
+
+    from yamk.lib.jobserver import Jobserver
+    from yamk.lib.utils import DAG, Node
+
+JobFuture = TypeVar("JobFuture", Future[int], asyncio.Future[int])
+THROTTLE_INTERVAL = 1.0
+JOBSERVER_INTERVAL = 0.05
+MEMINFO = Path("/proc/meminfo")
+
+
+class Throttle:
+    def __init__(self, *, max_load: float | None, min_free_memory: int | None) -> None:
+        self.max_load = max_load
+        self.min_free_memory = min_free_memory
+
+    def allows(self) -> bool:
+        if self.max_load is not None and self.load() >= self.max_load:
+            return False
+        if self.min_free_memory is not None:
+            free_memory = self.free_memory()
+            if free_memory is not None and free_memory < self.min_free_memory:
+                return False
+        return True
+
+    @staticmethod
+    def load() -> float:
+        if sys.platform == "win32":
+            load = 0.0
+        else:
+            load = os.getloadavg()[0]
+        return load
+
+    @staticmethod
+    def free_memory() -> int | None:
+        try:
+            with MEMINFO.open() as file:
+                for line in file:
+                    if line.startswith("MemAvailable:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            return None
+        return None
+
+
+@dataclass(frozen=True, slots=True)
+class Resources:
+    weight: int = 1
+    pools: tuple[str, ...] = ()
+
+
+class Scheduler:
+    def __init__(
+        self,
+        dag: DAG,
+        *,
+        jobs: int,
+        schedule: Literal["c3", "critical-path"] = "c3",
+        timings: Mapping[str, int] | None = None,
+        throttle: Throttle | None = None,
+        keep_going: bool = False,
+        backoff: bool = False,
+        jobserver: Jobserver | None = None,
+        resources: Mapping[Node, Resources] | None = None,
+        pools: Mapping[str, int] | None = None,
+    ) -> None:
+        self.jobs = jobs
+        self.keep_going = keep_going
+        self.backoff = backoff
+        self.failed: list[Node] = []
+        self.skipped: list[Node] = []
+        self.throttle = throttle
+        self.jobserver = jobserver
+        self._throttled = False
+        self._starved = False
+        self._active = 0
+        self._waiting = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._acondition = asyncio.Condition()
+        self._wakeup: Future[int] | asyncio.Future[int] | None = None
+        self.nodes = [node for node in dag if node.should_build]
+        self.resources = resources or {}
+        self.pools = pools or {}
+        self._pool_usage: Counter[str] = Counter()
+        self._priority = {node: index for index, node in enumerate(self.nodes)}
+        if schedule == "critical-path":
+            self._rank = self._critical_path(timings or {})
+        else:
+            self._rank = dict.fromkeys(self.nodes, 0)
+        self._pending = {
+            node: sum(child in self._priority for child in node.requires)
+            for node in self.nodes
+        }
+        self._ready: list[tuple[int, int]] = []
+        for node, pending in self._pending.items():
+            if pending == 0:
+                self._push(node)
+
+    def run(self, build: Callable[[Node], int]) -> int:
+        if self.jobs == 1 and not self.backoff:
+            return self._run_serial(build)
+        return self._run_parallel(build)
+
+    @contextmanager
+    def released(self, node: Node) -> Iterator[None]:
+        weight = self._weight(node)
+        with self._condition:
+            self._release(weight)
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._waiting += weight
+                self._condition.wait_for(lambda: self._available(weight))
+                self._acquire(weight)
+
+    @asynccontextmanager
+    async def areleased(self, node: Node) -> AsyncIterator[None]:
+        weight = self._weight(node)
+        self._release(weight)
+        try:
+            yield
+        finally:
+            self._waiting += weight
+            async with self._acondition:
+                await self._acondition.wait_for(lambda: self._available(weight))
+            self._acquire(weight)
+
+    def _run_serial(self, build: Callable[[Node], int]) -> int:
+        status = 0
+        while node := self._next(0, status):
+            status = self._finish(node, build(node), status)
+        return status
+
+    def _run_parallel(self, build: Callable[[Node], int]) -> int:
+        status = 0
+        running: dict[Future[int], Node] = {}
+        workers = max(len(self.nodes), 1) if self.backoff else self.jobs
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            try:
+                while running or self._next_pending(status):
+                    with self._condition:
+                        while node := self._next(len(running), status):
+                            running[executor.submit(build, node)] = node
+                        self._wakeup = wakeup = Future[int]()
+                    done, _ = wait(
+                        [*running, wakeup],
+                        timeout=self._timeout(),
+                        return_when=FIRST_COMPLETED,
+                    )
+                    with self._condition:
+                        for future in self._done(done, running):
+                            status = self._finish(
+                                running.pop(future), future.result(), status
+                            )
+                        self._condition.notify_all()
+            finally:
+                with self._condition:
+                    self._closed = True
+                    self._condition.notify_all()
+        return status
+
+    async def arun(self, build: Callable[[Node], Awaitable[int]]) -> int:
+        status = 0
+        running: dict[asyncio.Future[int], Node] = {}
+        while running or self._next_pending(status):
+            while node := self._next(len(running), status):
+                running[asyncio.ensure_future(build(node))] = node
+            self._wakeup = wakeup = asyncio.get_running_loop().create_future()
+            done, _ = await asyncio.wait(
+                [*running, wakeup],
+                timeout=self._timeout(),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            for task in self._done(done, running):
+                status = self._finish(running.pop(task), task.result(), status)
+            async with self._acondition:
+                self._acondition.notify_all()
+        return status
+
+    def _done(
+        self, done: set[JobFuture], running: dict[JobFuture, Node]
+    ) -> list[JobFuture]:
+        finished = (future for future in done if future in running)
+        return sorted(finished, key=lambda future: self._priority[running[future]])
+
+    def _available(self, weight: int) -> bool:
+        if self._closed:
+            return True
+        if self._active + weight > self.jobs:
+            return False
+        if self.jobserver is None:
+            return True
+        while self._active + weight > len(self.jobserver.tokens) + 1:
+            if not self.jobserver.acquire():
+                self._starved = True
+                return False
+        return True
+
+    def _acquire(self, weight: int) -> None:
+        self._waiting -= weight
+        self._active += weight
+
+    def _release(self, weight: int) -> None:
+        self._active -= weight
+        if self._wakeup is not None and not self._wakeup.done():
+            self._wakeup.set_result(0)
+
+    def _next_pending(self, status: int) -> bool:
+        return bool(self._ready) and (not status or self.keep_going)
+
+    def _next(self, running: int, status: int) -> Node | None:
+        self._throttled = self._starved = False
+        if not self._next_pending(status) or self._waiting:
+            return None
+        if running and self.throttle is not None and not self.throttle.allows():
+            self._throttled = True
+            return None
+        return self._pop()
+
+    def _timeout(self) -> float | None:
+        if self._throttled:
+            return THROTTLE_INTERVAL
+        if self.jobserver is not None and (self._starved or self._waiting):
+            return JOBSERVER_INTERVAL
+        return None
+
+    def _finish(self, node: Node, result: int, status: int) -> int:
+        self._active -= self._weight(node)
+        self._pool_usage.subtract(self._pools(node))
+        self._return_tokens()
+        if not result:
+            self._complete(node)
+            return status
+
+        self.failed.append(node)
+        if self.keep_going:
+            self._block(node)
+        return status or result
+
+    def _return_tokens(self) -> None:
+        if self.jobserver is None:
+            return
+        needed = max(self._active + self._waiting - 1, 0)
+        while len(self.jobserver.tokens) > needed:
+            self.jobserver.release()
+
+    def _block(self, node: Node) -> None:
+        blocked = set(self.skipped)
+        unvisited = [node]
+        while unvisited:
+            for parent in unvisited.pop().required_by:
+                if parent in self._pending and parent not in blocked:
+                    blocked.add(parent)
+                    unvisited.append(parent)
+        self.skipped = sorted(blocked, key=self._priority.__getitem__)
+
+    def _critical_path(self, timings: Mapping[str, int]) -> dict[Node, int]:
+        known = [timings[node.target] for node in self.nodes if node.target in timings]
+        default = sum(known) // len(known) if known else 0
+        rank: dict[Node, int] = {}
+        for node in reversed(self.nodes):
+            parents = (rank[parent] for parent in node.required_by if parent in rank)
+            rank[node] = timings.get(node.target, default) + max(parents, default=0)
+        return rank
+
+    def _push(self, node: Node) -> None:
+        heapq.heappush(self._ready, (-self._rank[node], self._priority[node]))
+
+    def _pop(self) -> Node | None:
+        skipped = []
+        node = None
+        while self._ready:
+            item = heapq.heappop(self._ready)
+            candidate = self.nodes[item[1]]
+            if any(
+                self._pool_usage[pool] >= self.pools[pool]
+                for pool in self._pools(candidate)
+            ):
+                skipped.append(item)
+                continue
+            weight = self._weight(candidate)
+            if self._available(weight):
+                node = candidate
+                self._active += weight
+                self._pool_usage.update(self._pools(candidate))
+            else:
+                skipped.append(item)
+            break
+        for item in skipped:
+            heapq.heappush(self._ready, item)
+        return node
+
+    def _weight(self, node: Node) -> int:
+        resources = self.resources.get(node)
+        if resources is None:
+            return 1
+        return min(max(resources.weight, 1), self.jobs)
+
+    def _pools(self, node: Node) -> tuple[str, ...]:
+        resources = self.resources.get(node)
+        return () if resources is None else resources.pools
+
+    def _complete(self, node: Node) -> None:
+        for parent in node.required_by:
+            if parent not in self._pending:
+                continue
+            self._pending[parent] -= 1
+            if self._pending[parent] == 0:
+                self._push(parent)
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import select
+import signal
+import subprocess
+import sys
+import time
+from contextlib import suppress
+from typing import IO, TYPE_CHECKING, Self
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Mapping
+    from types import TracebackType
+
+    from yamk.lib.type_defs import SubprocessKwargs
+
+DEFAULT_SHELL = "/bin/sh"
+COMMANDS_FD = 3
+STATUS_FD = 4
+TIMED_OUT = 124
+KILL_TIMEOUT = 5.0
+POLL_INTERVAL = 0.05
+PERSISTENT_SHELLS = os.name == "posix"
+DRIVER = """\
+cd "$1" || exit
+while IFS= read -r __yamk_lines <&3; do
+    __yamk_command=
+    while [ "$__yamk_lines" -gt 0 ]; do
+        IFS= read -r __yamk_line <&3
+        __yamk_command="$__yamk_command$__yamk_line
+"
+        __yamk_lines=$((__yamk_lines - 1))
+    done
+    eval "$__yamk_command" 3<&- 4>&-
+    printf '%d\\n' "$?" >&4
+done
+"""
+
+
+def wait_process(process: subprocess.Popen[bytes], timeout: float) -> int:
+    try:
+        return process.wait(timeout)
+    except BaseException:
+        kill_group(process.pid, process.wait)
+        raise
+
+
+async def await_process(process: asyncio.subprocess.Process, time_limit: float) -> int:
+    try:
+        return await asyncio.wait_for(process.wait(), time_limit)
+    except BaseException as exc:
+        await akill_group(process)
+        if isinstance(exc, TimeoutError):
+            raise subprocess.TimeoutExpired(str(process.pid), time_limit) from None
+        raise
+
+
+def kill_group(pgid: int, wait: Callable[[float], object]) -> None:
+    for signum in KILL_SIGNALS:
+        with suppress(ProcessLookupError):
+            kill(pgid, signum)
+        with suppress(subprocess.TimeoutExpired):
+            wait(KILL_TIMEOUT)
+
+
+async def akill_group(process: asyncio.subprocess.Process) -> None:
+    for signum in KILL_SIGNALS:
+        with suppress(ProcessLookupError):
+            kill(process.pid, signum)
+        with suppress(TimeoutError):
+            await asyncio.wait_for(process.wait(), KILL_TIMEOUT)
+    await process.wait()
+
+
+def pid_waiter(pid: int) -> Callable[[float], object]:
+    def wait(timeout: float) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if reaped(pid):
+                return
+            time.sleep(POLL_INTERVAL)
+        raise subprocess.TimeoutExpired(str(pid), timeout)
+
+    return wait
+
+
+if sys.platform == "win32":
+    KILL_SIGNALS = (signal.SIGTERM,)
+
+    def kill(pid: int, signum: int) -> None:
+        with suppress(PermissionError):
+            os.kill(pid, signum)
+
+    def reaped(pid: int) -> bool:  # noqa: ARG001
+        return True
+
+    def move_above_std_fds(fd: int) -> int:
+        return fd
+
+    def spawn(
+        shell: str,  # noqa: ARG001
+        argv: list[str],  # noqa: ARG001
+        env: Mapping[str, str],  # noqa: ARG001
+        commands_read: int,  # noqa: ARG001
+        status_write: int,  # noqa: ARG001
+        *,
+        process_group: bool,  # noqa: ARG001
+    ) -> int:
+        msg = "Persistent shells are only supported on POSIX systems"
+        raise RuntimeError(msg)
+
+else:
+    import fcntl
+
+    KILL_SIGNALS = (signal.SIGTERM, signal.SIGKILL)
+    kill = os.killpg
+
+    def reaped(pid: int) -> bool:
+        try:
+            return bool(os.waitpid(pid, os.WNOHANG)[0])
+        except ChildProcessError:
+            return True
+
+    def move_above_std_fds(fd: int) -> int:
+        new_fd = fcntl.fcntl(fd, fcntl.F_DUPFD_CLOEXEC, STATUS_FD + 1)
+        os.close(fd)
+        return new_fd
+
+    def spawn(
+        shell: str,
+        argv: list[str],
+        env: Mapping[str, str],
+        commands_read: int,
+        status_write: int,
+        *,
+        process_group: bool,
+    ) -> int:
+        file_actions = [
+            (os.POSIX_SPAWN_DUP2, commands_read, COMMANDS_FD),
+            (os.POSIX_SPAWN_DUP2, status_write, STATUS_FD),
+        ]
+        if process_group:
+            return os.posix_spawnp(
+                shell, argv, env, file_actions=file_actions, setpgroup=0
+            )
+        return os.posix_spawnp(shell, argv, env, file_actions=file_actions)
+
+
+class ShellSession:
+    def __init__(
+        self, subprocess_kwargs: SubprocessKwargs, *, process_group: bool = False
+    ) -> None:
+        self.subprocess_kwargs = subprocess_kwargs
+        self.process_group = process_group
+        self._pid: int | None = None
+        self._commands: IO[str]
+        self._status: IO[str]
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        if exc_type is not None:
+            self.kill()
+        self.close()
+
+    def run(self, command: str, timeout: float | None = None) -> int:
+        if self._pid is None:
+            self._start()
+        lines = command.splitlines() or [""]
+        self._commands.write(f"{len(lines)}\n")
+        self._commands.writelines(f"{line}\n" for line in lines)
+        with suppress(BrokenPipeError):
+            self._commands.flush()
+        if timeout is not None:
+            ready, _, _ = select.select([self._status], [], [], timeout)
+            if not ready:
+                self.kill()
+                raise subprocess.TimeoutExpired(command, timeout)
+        if status := self._status.readline():
+            return int(status)
+
+        return self.close()
+
+    def kill(self) -> None:
+        if self._pid is None or not self.process_group:
+            return
+        kill_group(self._pid, pid_waiter(self._pid))
+        self._pid = None
+        self._close_pipes()
+
+    def close(self) -> int:
+        if self._pid is None:
+            return 0
+        self._close_pipes()
+        _, wait_status = os.waitpid(self._pid, 0)
+        self._pid = None
+        return os.waitstatus_to_exitcode(wait_status)
+
+    def _close_pipes(self) -> None:
+        for file in (self._commands, self._status):
+            with suppress(BrokenPipeError):
+                file.close()
+
+    def _start(self) -> None:
+        commands_read, commands_write = os.pipe()
+        status_read, status_write = os.pipe()
+        commands_read = move_above_std_fds(commands_read)
+        status_write = move_above_std_fds(status_write)
+        shell = self.subprocess_kwargs["executable"] or DEFAULT_SHELL
+        cwd = os.fspath(self.subprocess_kwargs["cwd"])
+        argv = [shell, "-c", DRIVER, shell, cwd]
+        env = self.subprocess_kwargs.get("env", os.environ)
+        try:
+            self._pid = spawn(
+                shell,
+                argv,
+                env,
+                commands_read,
+                status_write,
+                process_group=self.process_group,
+            )
+        finally:
+            os.close(commands_read)
+            os.close(status_write)
+        self._commands = os.fdopen(commands_write, "w")
+        self._status = os.fdopen(status_read)
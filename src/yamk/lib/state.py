@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import json
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from yamk.lib.type_defs import JSONType
+
+STATE_DIR = ".yamk"
+Section = dict[str, "JSONType"]
+
+
+def state_path(cookbook: Path) -> Path:
+    return cookbook.parent.joinpath(STATE_DIR, f"{cookbook.name}.state.json")
+
+
+class State:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._data: dict[str, Section] | None = None
+        self._changes: dict[str, dict[str, JSONType | None]] = {}
+
+    @property
+    def data(self) -> dict[str, Section]:
+        if self._data is None:
+            self._data = self._apply(self._read())
+        return self._data
+
+    def get(self, section: str, key: str) -> JSONType | None:
+        return self.data.get(section, {}).get(key)
+
+    def items(self, section: str) -> Section:
+        return self.data.get(section, {})
+
+    def set(self, section: str, key: str, value: JSONType) -> None:
+        if self._data is not None:
+            self._data.setdefault(section, {})[key] = value
+        self._changes.setdefault(section, {})[key] = value
+
+    def delete(self, section: str, key: str) -> None:
+        if self._data is not None:
+            self._data.get(section, {}).pop(key, None)
+        self._changes.setdefault(section, {})[key] = None
+
+    def save(self) -> bool:
+        if not self._changes:
+            return True
+
+        data = self._apply(self._read())
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                "w", dir=self.path.parent, prefix=f".{self.path.name}.", delete=False
+            ) as file:
+                json.dump(data, file, separators=(",", ":"))
+            Path(file.name).replace(self.path)
+        except OSError:
+            return False
+        self._data = data
+        self._changes.clear()
+        return True
+
+    def _apply(self, data: dict[str, Section]) -> dict[str, Section]:
+        for section, changes in self._changes.items():
+            stored = data.setdefault(section, {})
+            for key, value in changes.items():
+                if value is None:
+                    stored.pop(key, None)
+                else:
+                    stored[key] = value
+        return data
+
+    def _read(self) -> dict[str, Section]:
+        try:
+            with self.path.open() as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
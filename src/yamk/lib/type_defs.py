@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Protocol, Required, Self, TypedDict
+from typing import Literal, NotRequired, Protocol, Required, Self, TypedDict
 
 Pathlike = str | Path
+JSONType = bool | int | float | str | list["JSONType"] | dict[str, "JSONType"] | None
 
 
 class Comparable(Protocol):
@@ -11,9 +12,17 @@ class Comparable(Protocol):
 
 
 class SubprocessKwargs(TypedDict):
-    shell: bool
+    shell: Literal[True]
     cwd: Path
     executable: str | None
+    env: NotRequired[dict[str, str]]
+    pass_fds: NotRequired[tuple[int, ...]]
+
+
+class ExecKwargs(TypedDict):
+    cwd: Path | None
+    close_fds: bool
+    env: NotRequired[dict[str, str]]
 
 
 class ExistenceCheck(TypedDict, total=False):
@@ -21,6 +30,8 @@ class ExistenceCheck(TypedDict, total=False):
     returncode: int
     stdout: str | None
     stderr: str | None
+    cache_ttl: str | float
+    invalidate_on: list[str]
 
 
 class RawRecipe(TypedDict, total=False):
@@ -31,6 +42,19 @@ class RawRecipe(TypedDict, total=False):
     regex: bool
     exists_only: bool
     allow_failures: bool
+    persistent_shell: bool
+    direct_exec: bool
+    retries: int
+    max_backoff: float
+    jitter: float
+    retry_on: list[int]
+    weight: int
+    pools: list[str]
+    timeout: str | float
+    env_inputs: list[str]
+    ignore: list[str]
+    tree_index: bool
+    early_cutoff: bool
     alias: str
     existence_command: str
     existence_check: ExistenceCheck
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import math
 import os
 import re
@@ -34,6 +36,70 @@ SUPPORTED_FILE_EXTENSIONS = {
     ".yaml": "yaml",
     ".json": "json",
 }
+SIZE = re.compile(
+    r"(?P<number>\d+(?:\.\d+)?) *(?P<unit>[KMGT]?)(?:i?B)?", re.IGNORECASE
+)
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+DURATION = re.compile(r"(?P<number>\d+(?:\.\d+)?) *(?P<unit>ms|s|m|h|)", re.IGNORECASE)
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, "": 1}
+SHELL_METACHARACTERS = frozenset("|&;<>()$`\\*?[#~{}\n")
+SHELL_BUILTINS = frozenset(
+    {
+        "!",
+        ".",
+        ":",
+        "[",
+        "[[",
+        "alias",
+        "bg",
+        "break",
+        "case",
+        "cd",
+        "command",
+        "continue",
+        "do",
+        "done",
+        "echo",
+        "elif",
+        "else",
+        "esac",
+        "eval",
+        "exec",
+        "exit",
+        "export",
+        "fc",
+        "fg",
+        "fi",
+        "for",
+        "function",
+        "getopts",
+        "hash",
+        "if",
+        "jobs",
+        "local",
+        "printf",
+        "read",
+        "readonly",
+        "return",
+        "select",
+        "set",
+        "shift",
+        "source",
+        "test",
+        "then",
+        "time",
+        "times",
+        "trap",
+        "type",
+        "ulimit",
+        "umask",
+        "unalias",
+        "unset",
+        "until",
+        "wait",
+        "while",
+    }
+)
 FlatVariables = dict[str, Any]  # type: ignore[explicit-any]
 Variables = dict[str, FlatVariables]
 
@@ -70,7 +136,20 @@ class Recipe:
             else:
                 self.existence_check["command"] = existence_command
         self.recursive = raw_recipe.get("recursive", False)
+        self.ignore = raw_recipe.get("ignore", [])
+        self.tree_index = raw_recipe.get("tree_index")
         self.update = raw_recipe.get("update", False)
+        self.early_cutoff = raw_recipe.get("early_cutoff", False)
+        self.persistent_shell = raw_recipe.get("persistent_shell")
+        self.direct_exec = raw_recipe.get("direct_exec")
+        self.retries = raw_recipe.get("retries")
+        self.max_backoff = raw_recipe.get("max_backoff")
+        self.jitter = raw_recipe.get("jitter", 0)
+        self.retry_on = raw_recipe.get("retry_on")
+        self.weight = raw_recipe.get("weight", 1)
+        self.pools = raw_recipe.get("pools", [])
+        self.timeout = raw_recipe.get("timeout")
+        self.env_inputs = raw_recipe.get("env_inputs", [])
         temp_vars: Variables = {
             "global": file_vars,
             "env": dict(**os.environ),
@@ -110,6 +189,15 @@ class Recipe:
             return f"Specified recipe for {self.target}"
         return f"Generic recipe for {self.target}"
 
+    def signature(self) -> str:
+        payload = {
+            "commands": self.commands,
+            "vars": self.vars["local"],
+            "env": {name: self.vars["env"].get(name) for name in self.env_inputs},
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+        return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
     def for_target(self, target: str, extra: list[str]) -> Recipe:
         if self._specified:
             return self
@@ -366,15 +454,26 @@ class DAG:
         return new_list
 
 
+@dataclass(frozen=True)
+class Invocation:
+    command: str
+    args: list[str] | None
+    timeout: float | None
+
+
 @dataclass(frozen=True)
 class CommandReport:
     command: str
     retries: int
     timing: Timing
     success: bool
+    timed_out: bool = False
 
     def print(self, cols: int) -> None:
-        if not self.success:
+        if self.timed_out:
+            indicator = "⏰"
+            sgr_code = SGRCodes.MAGENTA
+        elif not self.success:
             indicator = "🔴"
             sgr_code = SGRCodes.RED
         elif self.retries:
@@ -456,12 +555,42 @@ def extract_options(string: str) -> tuple[str, set[str]]:
     return string, {s.strip() for s in options.split(",")}
 
 
+def split_command(command: str) -> list[str] | None:
+    if any(char in SHELL_METACHARACTERS for char in command):
+        return None
+    try:
+        args = shlex.split(command)
+    except ValueError:
+        return None
+    if not args or args[0] in SHELL_BUILTINS or "=" in args[0]:
+        return None
+    return args
+
+
 def human_readable_timestamp(timestamp: float) -> str:
     if math.isinf(timestamp):
         return "end of time"
     return str(datetime.fromtimestamp(timestamp, tz=UTC))
 
 
+def parse_size(size: str) -> int:
+    match = re.fullmatch(SIZE, size.strip())
+    if match is None:
+        msg = f"{size} is not a valid size"
+        raise ValueError(msg)
+    return int(float(match["number"]) * SIZE_UNITS[match["unit"].upper()])
+
+
+def parse_duration(duration: str | float) -> float:
+    if isinstance(duration, int | float):
+        return float(duration)
+    match = re.fullmatch(DURATION, duration.strip())
+    if match is None:
+        msg = f"{duration} is not a valid duration"
+        raise ValueError(msg)
+    return float(match["number"]) * DURATION_UNITS[match["unit"].lower()]
+
+
 def print_reports(reports: list[CommandReport]) -> None:
     SGRString("Yam Report", params=[SGRCodes.BOLD]).header(padding="=")
 
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from time import sleep
+from typing import TYPE_CHECKING
+
+from yamk.lib.fs import newest_mtime
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+    from pathlib import Path
+
+    from yamk.lib.utils import Node
+
+WATCH_INTERVAL = 0.25
+
+Signature = tuple[int, int, int] | None
+
+
+class Watcher:
+    def __init__(self, paths: Mapping[Node, tuple[Path, bool]]) -> None:
+        self.paths = paths
+        self._signatures = {node: self._signature(node) for node in paths}
+
+    def wait(self) -> None:
+        sleep(WATCH_INTERVAL)
+
+    def changes(self) -> set[Node]:
+        changed = set()
+        for node in self.paths:
+            signature = self._signature(node)
+            if signature != self._signatures[node]:
+                self._signatures[node] = signature
+                changed.add(node)
+        return changed
+
+    def _signature(self, node: Node) -> Signature:
+        path, recursive = self.paths[node]
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        newest = newest_mtime(path) if recursive else 0
+        return stat.st_mtime_ns, stat.st_size, newest
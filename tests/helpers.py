@@ -1,23 +1,40 @@
 from __future__ import annotations
 
+import os
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from typing import Literal, TypedDict, Unpack
+from typing import TYPE_CHECKING, Literal, TypedDict, Unpack
 from unittest import mock
 
+import pytest
+
 from yamk.command.make import MakeCommand
 
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
 TEST_DATA_ROOT = Path(__file__).resolve().parent.joinpath("data")
 TEST_COOKBOOK = TEST_DATA_ROOT.joinpath("mk.toml")
+posix_only = pytest.mark.skipif(os.name != "posix", reason="requires a POSIX system")
 DEFAULT_VALUES: MakeCommandArgs = {
     "bare": False,
     "cookbook": TEST_COOKBOOK,
     "cookbook_type": None,
     "dry_run": False,
     "echo_override": False,
+    "engine": "subprocess",
     "extra": [],
     "force_make": False,
+    "jobs": 1,
+    "jobserver_style": "pipe",
+    "keep_going": False,
+    "max_load": None,
+    "min_free_memory": None,
     "print_timing_report": False,
     "retries": 0,
+    "schedule": "c3",
     "shell": None,
     "up_to_date": [],
     "variables": {},
@@ -31,10 +48,17 @@ class MakeCommandArgs(TypedDict, total=False):
     cookbook_type: Literal["json", "yaml", "toml"] | None
     dry_run: bool
     echo_override: bool
+    engine: Literal["subprocess", "asyncio"]
     extra: list[str]
     force_make: bool
+    jobs: int
+    jobserver_style: Literal["pipe", "fifo"]
+    keep_going: bool
+    max_load: float | None
+    min_free_memory: int | None
     print_timing_report: bool
     retries: int
+    schedule: Literal["c3", "critical-path"]
     shell: str | None
     up_to_date: list[str]
     variables: dict[str, str]
@@ -59,3 +83,57 @@ def get_make_command(
     make_args.update(kwargs)
 
     return MakeCommand(target, **make_args)
+
+
+def get_cookbook_command(
+    directory: Path,
+    content: str,
+    target: str = "out.txt",
+    **kwargs: Unpack[MakeCommandArgs],
+) -> MakeCommand:
+    path = directory.joinpath("cookbook.yaml")
+    if not path.exists() or path.read_text() != content:
+        path.write_text(content)
+    kwargs["cookbook"] = path
+    return get_make_command(target, **kwargs)
+
+
+class CacheHandler(BaseHTTPRequestHandler):
+    server: CacheServer
+
+    def do_GET(self) -> None:
+        body = self.server.artifacts.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_PUT(self) -> None:
+        length = int(self.headers["Content-Length"])
+        self.server.artifacts[self.path] = self.rfile.read(length)
+        self.send_response(201)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        pass
+
+
+class CacheServer(ThreadingHTTPServer):
+    artifacts: dict[str, bytes]
+
+
+@contextmanager
+def cache_server() -> Iterator[CacheServer]:
+    server = CacheServer(("127.0.0.1", 0), CacheHandler)
+    server.artifacts = {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,122 @@
+import threading
+from pathlib import Path
+from unittest import mock
+
+from yamk.lib.artifacts import ArtifactCache
+
+from tests.helpers import get_cookbook_command, posix_only
+
+COOKBOOK = """\
+$globals:
+  version: "8.1"
+  artifact_cache:
+    path: cache
+    max_size: 1M
+
+out.txt:
+  requires:
+    - in.txt
+  commands:
+    - cp in.txt out.txt
+"""
+
+HARDLINK_COOKBOOK = """\
+$globals:
+  version: "8.1"
+  artifact_cache:
+    path: cache
+    hardlink: true
+
+out.txt:
+  requires:
+    - in.txt
+  commands:
+    - cat in.txt > out.txt
+"""
+
+
+@posix_only
+def test_artifacts_are_restored_instead_of_rebuilt(tmp_path: Path) -> None:
+    source = tmp_path.joinpath("in.txt")
+    output = tmp_path.joinpath("out.txt")
+    source.write_text("first")
+    get_cookbook_command(tmp_path, COOKBOOK).make()
+    source.write_text("second")
+    get_cookbook_command(tmp_path, COOKBOOK).make()
+    assert output.read_text() == "second"
+
+    source.write_text("first")
+    with mock.patch("yamk.command.make.subprocess.run") as runner:
+        get_cookbook_command(tmp_path, COOKBOOK).make()
+    assert runner.call_count == 0
+    assert output.read_text() == "first"
+    assert output.stat().st_mtime_ns > source.stat().st_mtime_ns
+
+
+@posix_only
+def test_hardlinked_artifacts_survive_in_place_rebuilds(tmp_path: Path) -> None:
+    source = tmp_path.joinpath("in.txt")
+    output = tmp_path.joinpath("out.txt")
+    for content in ("A", "B", "A", "C", "A"):
+        source.write_text(content)
+        get_cookbook_command(tmp_path, HARDLINK_COOKBOOK).make()
+        assert output.read_text() == content
+
+
+def test_artifacts_are_restored_off_the_event_loop(tmp_path: Path) -> None:
+    threads: list[threading.Thread] = []
+
+    def restore(_cache: ArtifactCache, _key: str, _path: Path) -> bool:
+        threads.append(threading.current_thread())
+        return False
+
+    tmp_path.joinpath("in.txt").write_text("first")
+    make_command = get_cookbook_command(tmp_path, COOKBOOK)
+    make_command.engine = "asyncio"
+    with (
+        mock.patch.object(ArtifactCache, "restore", autospec=True, side_effect=restore),
+        mock.patch("yamk.command.make.asyncio.create_subprocess_shell") as runner,
+    ):
+        runner.return_value.wait = mock.AsyncMock(return_value=0)
+        make_command.make()
+    assert threads
+    assert threading.main_thread() not in threads
+
+
+def test_artifacts_are_not_used_in_dry_runs(tmp_path: Path) -> None:
+    tmp_path.joinpath("in.txt").write_text("first")
+    make_command = get_cookbook_command(tmp_path, COOKBOOK)
+    make_command.dry_run = True
+    make_command.make()
+    assert not tmp_path.joinpath("cache").exists()
+
+
+RECURSIVE_COOKBOOK = """\
+$globals:
+  version: "8.1"
+  artifact_cache: cache
+
+src:
+  recursive: true
+  exists_only: true
+
+out.txt:
+  requires:
+    - src
+  commands:
+    - cat src/pkg/a.txt > out.txt
+"""
+
+
+@posix_only
+def test_artifacts_track_files_in_recursive_requirements(tmp_path: Path) -> None:
+    source = tmp_path.joinpath("src", "pkg", "a.txt")
+    source.parent.mkdir(parents=True)
+    source.write_text("one")
+    output = tmp_path.joinpath("out.txt")
+    get_cookbook_command(tmp_path, RECURSIVE_COOKBOOK).make()
+    assert output.read_text() == "one"
+
+    source.write_text("two")
+    get_cookbook_command(tmp_path, RECURSIVE_COOKBOOK).make()
+    assert output.read_text() == "two"
@@ -0,0 +1,95 @@
+import shutil
+from pathlib import Path
+from typing import Literal
+from unittest import mock
+
+import pytest
+
+from tests.helpers import get_make_command, posix_only, runner_exit_success
+
+COOKBOOK = "direct_exec.yaml"
+
+
+@mock.patch("yamk.command.make.subprocess.run", new_callable=runner_exit_success)
+def test_make_with_direct_exec(runner: mock.MagicMock, tmp_path: Path) -> None:
+    make_command = get_make_command(
+        cookbook_name=COOKBOOK, target="simple", variables={"DIR": str(tmp_path)}
+    )
+    make_command.make()
+    assert runner.call_args_list == [
+        mock.call(
+            [shutil.which("touch"), f"{tmp_path}/marker"], **make_command.exec_kwargs
+        ),
+        mock.call("echo done", **make_command.subprocess_kwargs),
+        mock.call(f"ls {tmp_path} | wc -l", **make_command.subprocess_kwargs),
+        mock.call("true", **make_command.subprocess_kwargs),
+    ]
+
+
+@mock.patch("yamk.command.make.subprocess.run", new_callable=runner_exit_success)
+def test_make_with_noshell_option(runner: mock.MagicMock) -> None:
+    make_command = get_make_command(cookbook_name=COOKBOOK, target="forced")
+    make_command.make()
+    assert runner.call_args_list == [
+        mock.call([shutil.which("true")], **make_command.exec_kwargs),
+        mock.call("true", **make_command.subprocess_kwargs),
+    ]
+
+
+@posix_only
+def test_make_with_direct_exec_runs_the_program(tmp_path: Path) -> None:
+    make_command = get_make_command(
+        cookbook_name=COOKBOOK, target="simple", variables={"DIR": str(tmp_path)}
+    )
+    make_command.make()
+    assert tmp_path.joinpath("marker").exists()
+    assert all(report.success for report in make_command.reports)
+
+
+@posix_only
+def test_make_with_direct_exec_and_asyncio_engine(tmp_path: Path) -> None:
+    make_command = get_make_command(
+        cookbook_name=COOKBOOK,
+        target="simple",
+        engine="asyncio",
+        variables={"DIR": str(tmp_path)},
+    )
+    make_command.make()
+    assert tmp_path.joinpath("marker").exists()
+    assert all(report.success for report in make_command.reports)
+
+
+@posix_only
+@pytest.mark.parametrize("engine", ["subprocess", "asyncio"])
+def test_make_with_unavailable_programs(
+    engine: Literal["subprocess", "asyncio"], tmp_path: Path
+) -> None:
+    tmp_path.joinpath("not-executable").write_text("#!/bin/sh\n")
+    make_command = get_make_command(
+        cookbook_name=COOKBOOK,
+        target="unavailable",
+        engine=engine,
+        variables={"DIR": str(tmp_path)},
+    )
+    make_command.make()
+    assert tmp_path.joinpath("marker").exists()
+    assert [report.success for report in make_command.reports] == [
+        False,
+        False,
+        True,
+    ]
+
+
+@pytest.mark.parametrize("engine", ["subprocess", "asyncio"])
+def test_make_with_missing_program(
+    engine: Literal["subprocess", "asyncio"], tmp_path: Path
+) -> None:
+    make_command = get_make_command(
+        cookbook_name=COOKBOOK,
+        target="missing",
+        engine=engine,
+        variables={"DIR": str(tmp_path)},
+    )
+    with pytest.raises(SystemExit) as exc_info:
+        make_command.make()
+    assert exc_info.value.code == 127
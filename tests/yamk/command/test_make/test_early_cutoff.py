@@ -0,0 +1,75 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from tests.helpers import get_cookbook_command, posix_only
+
+pytestmark = posix_only
+
+COOKBOOK = """\
+$globals:
+  version: "8.1"
+
+generated.txt:
+  early_cutoff: {early_cutoff}
+  requires:
+    - source.txt
+  commands:
+    - cut -c1-4 source.txt > generated.txt
+
+final.txt:
+  requires:
+    - generated.txt
+  commands:
+    - cp generated.txt final.txt
+    - echo built >> log.txt
+"""
+
+
+def make(tmp_path: Path, early_cutoff: str = "true") -> int:
+    cookbook = COOKBOOK.format(early_cutoff=early_cutoff)
+    get_cookbook_command(tmp_path, cookbook, target="final.txt").make()
+    return len(tmp_path.joinpath("log.txt").read_text().splitlines())
+
+
+def change_source(tmp_path: Path, content: str) -> None:
+    source = tmp_path.joinpath("source.txt")
+    source.write_text(content)
+    mtime = tmp_path.joinpath("final.txt").stat().st_mtime_ns + 1
+    os.utime(source, ns=(mtime, mtime))
+
+
+@pytest.fixture
+def built(tmp_path: Path) -> Path:
+    source = tmp_path.joinpath("source.txt")
+    source.write_text("same prefix")
+    os.utime(source, ns=(10**9, 10**9))
+    assert make(tmp_path) == 1
+    return tmp_path
+
+
+def test_identical_output_skips_dependents(built: Path) -> None:
+    change_source(built, "same content")
+    assert make(built) == 1
+    assert built.joinpath("generated.txt").read_text() == "same\n"
+
+
+def test_logical_timestamp_is_kept(built: Path) -> None:
+    change_source(built, "same content")
+    assert make(built) == 1
+    os.utime(built.joinpath("source.txt"), ns=(10**9, 10**9))
+    assert make(built) == 1
+
+
+def test_changed_output_rebuilds_dependents(built: Path) -> None:
+    change_source(built, "new content")
+    assert make(built) == 2
+    assert built.joinpath("final.txt").read_text() == "new \n"
+
+
+def test_without_early_cutoff(tmp_path: Path) -> None:
+    tmp_path.joinpath("source.txt").write_text("same prefix")
+    assert make(tmp_path, "false") == 1
+    change_source(tmp_path, "same content")
+    assert make(tmp_path, "false") == 2
@@ -0,0 +1,58 @@
+from unittest import mock
+
+import pytest
+
+from tests.helpers import get_make_command
+
+
+def get_process(returncode: int, stdout: bytes = b"", stderr: bytes = b"") -> mock.Mock:
+    process = mock.Mock(returncode=returncode)
+    process.wait = mock.AsyncMock(return_value=returncode)
+    process.communicate = mock.AsyncMock(return_value=(stdout, stderr))
+    return process
+
+
+@mock.patch("yamk.command.make.asyncio.create_subprocess_shell")
+def test_asyncio_engine_runs_commands_in_order(runner: mock.AsyncMock) -> None:
+    runner.return_value = get_process(0)
+    make_command = get_make_command(
+        cookbook_name="make.yaml", target="with_requirements", engine="asyncio"
+    )
+    make_command.make()
+    assert runner.call_args_list == [
+        mock.call("echo two_commands", **make_command.subprocess_kwargs),
+        mock.call("echo 42", **make_command.subprocess_kwargs),
+        mock.call("echo with_requirements", **make_command.subprocess_kwargs),
+    ]
+
+
+@mock.patch("yamk.command.make.asyncio.sleep")
+@mock.patch("yamk.command.make.asyncio.create_subprocess_shell")
+def test_asyncio_engine_retries_without_blocking(
+    runner: mock.AsyncMock, sleep: mock.AsyncMock
+) -> None:
+    runner.return_value = get_process(42)
+    make_command = get_make_command(
+        cookbook_name="exceptions.yaml", target="failure", engine="asyncio", retries=2
+    )
+    with pytest.raises(SystemExit) as exc_info:
+        make_command.make()
+    assert exc_info.value.code == 42
+    assert runner.call_count == 3
+    assert sleep.await_args_list == [mock.call(1), mock.call(2)]
+    assert make_command.reports[0].retries == 2
+
+
+@mock.patch("yamk.command.make.subprocess.run")
+@mock.patch("yamk.command.make.asyncio.create_subprocess_shell")
+def test_asyncio_engine_runs_existence_checks(
+    runner: mock.AsyncMock, sync_runner: mock.MagicMock
+) -> None:
+    runner.return_value = get_process(0, stdout=b"yoink")
+    make_command = get_make_command(
+        cookbook_name="should_build.yaml", target="existence_command", engine="asyncio"
+    )
+    make_command.make()
+    assert make_command.existence == {"existence_command": True}
+    assert runner.call_count == 1
+    assert sync_runner.call_count == 0
@@ -0,0 +1,138 @@
+import asyncio
+import os
+import threading
+import time
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from tests.helpers import get_make_command, runner_exit_success
+
+COOKBOOK = "existence.yaml"
+CHECKS = 3
+
+
+def test_existence_checks_run_concurrently() -> None:
+    barrier = threading.Barrier(CHECKS, timeout=5)
+
+    def run(command: str, **_kwargs: object) -> mock.MagicMock:
+        if command.endswith("runserver"):
+            return mock.MagicMock(returncode=0)
+        barrier.wait()
+        return mock.MagicMock(returncode=0, stdout="", stderr="")
+
+    make_command = get_make_command(cookbook_name=COOKBOOK, target="all")
+    with mock.patch("yamk.command.make.subprocess.run", side_effect=run) as runner:
+        make_command.make()
+    assert make_command.existence == dict.fromkeys(
+        ["image", "migrations", "fixtures"], True
+    )
+    assert runner.call_count == CHECKS + 1
+
+
+def test_asyncio_existence_checks_run_concurrently() -> None:
+    make_command = get_make_command(
+        cookbook_name=COOKBOOK, target="all", engine="asyncio"
+    )
+
+    async def check(_check: object) -> bool:
+        await asyncio.wait_for(barrier.wait(), timeout=5)
+        return False
+
+    barrier = asyncio.Barrier(CHECKS)
+    with mock.patch.object(make_command, "_acheck_command", side_effect=check):
+        dag = make_command._preprocess_target()
+    assert all(node.should_build for node in dag)
+
+
+def test_existence_checks_are_bounded() -> None:
+    make_command = get_make_command(cookbook_name=COOKBOOK, target="all")
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def check(_check: object) -> bool:
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        return False
+
+    with (
+        mock.patch.object(make_command, "_check_jobs", return_value=2),
+        mock.patch.object(make_command, "_check_command", side_effect=check),
+    ):
+        make_command._preprocess_target()
+    assert peak == 2
+
+
+CACHED_COOKBOOK = """\
+$globals:
+  version: "8.1"
+
+image:
+  phony: true
+  exists_only: true
+  existence_check:
+    command: docker image inspect app
+    cache_ttl: 1h
+    invalidate_on:
+      - Dockerfile
+  commands:
+    - docker build -t app .
+"""
+
+
+@pytest.fixture
+def cached_cookbook(tmp_path: Path) -> Path:
+    cookbook = tmp_path.joinpath("cookbook.yaml")
+    cookbook.write_text(CACHED_COOKBOOK)
+    tmp_path.joinpath("Dockerfile").write_text("FROM scratch")
+    return cookbook
+
+
+def check_image(cookbook: Path) -> bool:
+    make_command = get_make_command(target="image", cookbook=cookbook)
+    dag = make_command._preprocess_target()
+    make_command.state.save()
+    return not dag["image"].should_build
+
+
+@mock.patch("yamk.command.make.subprocess.run", new_callable=runner_exit_success)
+def test_existence_checks_are_cached(
+    runner: mock.MagicMock, cached_cookbook: Path
+) -> None:
+    runner.return_value.configure_mock(stdout="", stderr="")
+    assert check_image(cached_cookbook)
+    runner.return_value.returncode = 1
+    assert check_image(cached_cookbook)
+    assert runner.call_count == 1
+
+
+@mock.patch("yamk.command.make.subprocess.run", new_callable=runner_exit_success)
+def test_cached_existence_checks_expire(
+    runner: mock.MagicMock, cached_cookbook: Path
+) -> None:
+    runner.return_value.configure_mock(stdout="", stderr="")
+    with mock.patch("yamk.command.make.time", return_value=0):
+        assert check_image(cached_cookbook)
+    runner.return_value.returncode = 1
+    with mock.patch("yamk.command.make.time", return_value=3601):
+        assert not check_image(cached_cookbook)
+    assert runner.call_count == 2
+
+
+@mock.patch("yamk.command.make.subprocess.run", new_callable=runner_exit_success)
+def test_cached_existence_checks_are_invalidated(
+    runner: mock.MagicMock, cached_cookbook: Path
+) -> None:
+    runner.return_value.configure_mock(stdout="", stderr="")
+    assert check_image(cached_cookbook)
+    os.utime(cached_cookbook.with_name("Dockerfile"), ns=(1, 1))
+    runner.return_value.returncode = 1
+    assert not check_image(cached_cookbook)
+    assert runner.call_count == 2
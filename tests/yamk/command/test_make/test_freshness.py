@@ -0,0 +1,97 @@
+import os
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from tests.helpers import get_cookbook_command, posix_only, runner_exit_success
+
+COOKBOOK = """\
+$globals:
+  version: "8.1"
+  freshness: hash
+
+out.txt:
+  requires:
+    - in.txt
+  commands:
+    - cp in.txt out.txt
+"""
+
+
+@pytest.fixture
+def built(tmp_path: Path) -> Path:
+    source = tmp_path.joinpath("in.txt")
+    source.write_text("content")
+    tmp_path.joinpath("out.txt").write_text("content")
+    os.utime(source, ns=(10**9, 10**9))
+    get_cookbook_command(tmp_path, COOKBOOK).make()
+    return source
+
+
+@posix_only
+@mock.patch("yamk.command.make.subprocess.run", new_callable=runner_exit_success)
+def test_touched_requirement_does_not_rebuild(
+    runner: mock.MagicMock, built: Path, tmp_path: Path
+) -> None:
+    os.utime(built)
+    get_cookbook_command(tmp_path, COOKBOOK).make()
+    assert runner.call_count == 0
+
+
+@posix_only
+@mock.patch("yamk.command.make.subprocess.run", new_callable=runner_exit_success)
+def test_changed_requirement_rebuilds(
+    runner: mock.MagicMock, built: Path, tmp_path: Path
+) -> None:
+    built.write_text("new content")
+    os.utime(built, ns=(10**9, 10**9))
+    get_cookbook_command(tmp_path, COOKBOOK).make()
+    assert runner.call_count == 1
+    get_cookbook_command(tmp_path, COOKBOOK).make()
+    assert runner.call_count == 1
+
+
+@mock.patch("yamk.command.make.subprocess.run", new_callable=runner_exit_success)
+def test_first_run_falls_back_to_mtime(runner: mock.MagicMock, tmp_path: Path) -> None:
+    tmp_path.joinpath("out.txt").write_text("content")
+    tmp_path.joinpath("in.txt").write_text("content")
+    get_cookbook_command(tmp_path, COOKBOOK).make()
+    assert runner.call_count == 1
+
+
+def test_invalid_freshness_raises(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="not a valid freshness"):
+        get_cookbook_command(tmp_path, COOKBOOK.replace("hash", "checksum"))
+
+
+RECURSIVE_COOKBOOK = """\
+$globals:
+  version: "8.1"
+  freshness: hash
+
+src:
+  recursive: true
+  exists_only: true
+
+out.txt:
+  requires:
+    - src
+  commands:
+    - cat src/pkg/a.txt > out.txt
+"""
+
+
+@posix_only
+def test_changed_file_in_recursive_requirement_rebuilds(tmp_path: Path) -> None:
+    source = tmp_path.joinpath("src", "pkg", "a.txt")
+    source.parent.mkdir(parents=True)
+    source.write_text("one")
+    output = tmp_path.joinpath("out.txt")
+    get_cookbook_command(tmp_path, RECURSIVE_COOKBOOK).make()
+    assert output.read_text() == "one"
+
+    source.write_text("two")
+    os.utime(source, ns=(10**9, 10**9))
+    get_cookbook_command(tmp_path, RECURSIVE_COOKBOOK).make()
+    assert output.read_text() == "two"
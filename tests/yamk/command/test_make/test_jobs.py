@@ -0,0 +1,170 @@
+import os
+import shutil
+from pathlib import Path
+from typing import Literal
+from unittest import mock
+
+import pytest
+
+from yamk.lib.jobserver import Jobserver
+from yamk.lib.scheduler import Resources
+
+from tests.helpers import (
+    get_make_command,
+    posix_only,
+    runner_exit_failure,
+    runner_exit_success,
+)
+
+COOKBOOK = "dag.yaml"
+NESTED_COOKBOOK = """\
+$globals:
+  version: "8.1"
+
+all:
+  phony: true
+  commands:
+    - make -s 2> make.err
+"""
+NESTED_MAKEFILE = """\
+all: a b
+a b:
+\t@echo $@ >> log.txt
+"""
+
+
+@mock.patch("yamk.command.make.subprocess.run", new_callable=runner_exit_success)
+def test_make_in_parallel_respects_requirements(runner: mock.MagicMock) -> None:
+    make_command = get_make_command(
+        cookbook_name=COOKBOOK, target="dag_target_1", jobs=4
+    )
+    make_command.make()
+
+    assert runner.call_count == 5
+    commands = [call.args[0] for call in runner.call_args_list]
+    assert commands[-1] == "echo dag_target_1"
+    assert commands.index("echo dag_target_5") < commands.index("echo dag_target_2")
+    assert commands.index("echo dag_target_5") < commands.index("echo dag_target_4")
+    assert commands.index("echo dag_target_3") < commands.index("echo dag_target_4")
+
+
+@mock.patch("yamk.command.make.subprocess.run", new_callable=runner_exit_failure)
+def test_make_in_parallel_stops_on_failure(runner: mock.MagicMock) -> None:
+    make_command = get_make_command(
+        cookbook_name=COOKBOOK, target="dag_target_1", jobs=4
+    )
+    with pytest.raises(SystemExit) as exc_info:
+        make_command.make()
+    assert exc_info.value.code == 42
+    commands = {call.args[0] for call in runner.call_args_list}
+    assert commands <= {"echo dag_target_3", "echo dag_target_5"}
+
+
+@mock.patch("yamk.command.make.subprocess.run", new_callable=runner_exit_success)
+def test_make_records_target_timings(runner: mock.MagicMock) -> None:
+    make_command = get_make_command(cookbook_name=COOKBOOK, target="dag_target_3")
+    make_command.state.delete("timings", "dag_target_3")
+    make_command.make()
+    assert runner.call_count == 1
+    timing = make_command.state.get("timings", "dag_target_3")
+    assert isinstance(timing, int)
+    assert timing == make_command.reports[0].timing.nanoseconds
+
+
+@mock.patch("yamk.command.make.subprocess.run", new_callable=runner_exit_success)
+def test_make_with_critical_path_schedule(runner: mock.MagicMock) -> None:
+    make_command = get_make_command(
+        cookbook_name=COOKBOOK, target="dag_target_1", schedule="critical-path"
+    )
+    make_command.state.set("timings", "dag_target_3", 10**9)
+    make_command.make()
+    assert runner.call_args_list[0] == mock.call(
+        "echo dag_target_3", **make_command.subprocess_kwargs
+    )
+
+
+@posix_only
+@mock.patch("yamk.command.make.subprocess.run", new_callable=runner_exit_success)
+def test_make_in_parallel_exports_jobserver(runner: mock.MagicMock) -> None:
+    make_command = get_make_command(
+        cookbook_name=COOKBOOK, target="dag_target_1", jobs=2
+    )
+    make_command.make()
+
+    for call in runner.call_args_list:
+        read_fd, write_fd = call.kwargs["pass_fds"]
+        auth = f"{read_fd},{write_fd}"
+        assert call.kwargs["env"]["MAKEFLAGS"].endswith(
+            f"-j2 --jobserver-fds={auth} --jobserver-auth={auth}"
+        )
+
+
+@posix_only
+@mock.patch("yamk.command.make.subprocess.run", new_callable=runner_exit_success)
+def test_make_in_parallel_exports_fifo_jobserver(runner: mock.MagicMock) -> None:
+    make_command = get_make_command(
+        cookbook_name=COOKBOOK, target="dag_target_1", jobs=2, jobserver_style="fifo"
+    )
+    make_command.make()
+
+    for call in runner.call_args_list:
+        assert "-j2 --jobserver-auth=fifo:" in call.kwargs["env"]["MAKEFLAGS"]
+        assert "pass_fds" not in call.kwargs
+
+
+@posix_only
+@pytest.mark.skipif(shutil.which("make") is None, reason="requires GNU make")
+@pytest.mark.parametrize("engine", ["subprocess", "asyncio"])
+def test_make_shares_jobserver_with_nested_make(
+    engine: Literal["subprocess", "asyncio"], tmp_path: Path
+) -> None:
+    tmp_path.joinpath("Makefile").write_text(NESTED_MAKEFILE)
+    tmp_path.joinpath("cookbook.yaml").write_text(NESTED_COOKBOOK)
+    make_command = get_make_command(
+        target="all", cookbook=tmp_path.joinpath("cookbook.yaml"), jobs=2, engine=engine
+    )
+    make_command.make()
+
+    assert tmp_path.joinpath("make.err").read_text() == ""
+    assert sorted(tmp_path.joinpath("log.txt").read_text().split()) == ["a", "b"]
+
+
+@posix_only
+@mock.patch("yamk.command.make.subprocess.run", new_callable=runner_exit_success)
+def test_make_uses_inherited_jobserver(runner: mock.MagicMock) -> None:
+    jobserver = Jobserver.create(3)
+    assert jobserver is not None
+    with jobserver:
+        with mock.patch.dict(os.environ, {"MAKEFLAGS": jobserver.makeflags}):
+            make_command = get_make_command(
+                cookbook_name=COOKBOOK, target="dag_target_1"
+            )
+            make_command.make()
+        assert jobserver.acquire()
+        assert jobserver.acquire()
+
+    assert runner.call_count == 5
+    assert make_command.scheduler is not None
+    assert make_command.scheduler.jobs == 3
+    assert make_command.subprocess_kwargs["env"]["MAKEFLAGS"] == jobserver.makeflags
+
+
+@mock.patch("yamk.command.make.subprocess.run", new_callable=runner_exit_success)
+def test_make_in_parallel_with_pools(runner: mock.MagicMock) -> None:
+    make_command = get_make_command(cookbook_name="pools.yaml", target="all", jobs=4)
+    make_command.make()
+
+    assert runner.call_count == 3
+    assert make_command.scheduler is not None
+    resources = make_command.scheduler.resources
+    assert {node.target: resource for node, resource in resources.items()} == {
+        "migrate": Resources(weight=1, pools=("database",)),
+        "test": Resources(weight=2, pools=("database",)),
+        "all": Resources(weight=1, pools=()),
+    }
+
+
+def test_make_with_undefined_pool() -> None:
+    make_command = get_make_command(cookbook_name="pools.yaml", target="link", jobs=2)
+    with pytest.raises(ValueError, match="link uses the undefined pool linker"):
+        make_command.make()
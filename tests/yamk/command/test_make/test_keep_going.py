@@ -0,0 +1,47 @@
+import os
+from unittest import mock
+
+import pytest
+
+from tests.helpers import get_make_command
+
+COOKBOOK = "keep_going.yaml"
+
+
+def fail_false(command: str, **_: object) -> mock.MagicMock:
+    return mock.MagicMock(returncode=int(command == "false"))
+
+
+@mock.patch("yamk.command.make.subprocess.run", side_effect=fail_false)
+def test_make_stops_on_failure(runner: mock.MagicMock) -> None:
+    make_command = get_make_command(cookbook_name=COOKBOOK, target="root")
+    with pytest.raises(SystemExit) as exc_info:
+        make_command.make()
+    assert exc_info.value.code == 1
+    assert runner.call_args_list == [
+        mock.call("false", **make_command.subprocess_kwargs)
+    ]
+
+
+@pytest.mark.parametrize("jobs", [1, 4])
+@mock.patch("yamk.command.make.subprocess.run", side_effect=fail_false)
+def test_make_keep_going_builds_independent_targets(
+    runner: mock.MagicMock,
+    capsys: pytest.CaptureFixture[str],
+    jobs: int,
+) -> None:
+    make_command = get_make_command(
+        cookbook_name=COOKBOOK, target="root", keep_going=True, jobs=jobs
+    )
+    with pytest.raises(SystemExit) as exc_info:
+        make_command.make()
+    assert exc_info.value.code == 1
+    assert sorted(runner.call_args_list) == [
+        mock.call("echo healthy", **make_command.subprocess_kwargs),
+        mock.call("false", **make_command.subprocess_kwargs),
+    ]
+
+    out_lines = capsys.readouterr().out.split(os.linesep)
+    assert "❌ `broken` failed" in out_lines
+    assert "⏭️ `broken_branch` skipped because a requirement failed" in out_lines
+    assert "⏭️ `root` skipped because a requirement failed" in out_lines
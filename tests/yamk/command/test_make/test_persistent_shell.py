@@ -0,0 +1,44 @@
+from pathlib import Path
+from unittest import mock
+
+from tests.helpers import get_make_command, posix_only, runner_exit_success
+
+pytestmark = posix_only
+
+COOKBOOK = "persistent_shell.yaml"
+
+
+def test_make_with_persistent_shell(tmp_path: Path) -> None:
+    make_command = get_make_command(
+        cookbook_name=COOKBOOK, target="shared_state", variables={"DIR": str(tmp_path)}
+    )
+    make_command.make()
+    assert tmp_path.joinpath("marker").exists()
+    assert [report.success for report in make_command.reports] == [True, False, True]
+
+
+@mock.patch("yamk.command.make.subprocess.run", new_callable=runner_exit_success)
+def test_make_with_persistent_shell_disabled(
+    runner: mock.MagicMock, tmp_path: Path
+) -> None:
+    make_command = get_make_command(
+        cookbook_name=COOKBOOK,
+        target="separate_shells",
+        variables={"DIR": str(tmp_path)},
+    )
+    make_command.make()
+    assert runner.call_args_list == [
+        mock.call(f"cd {tmp_path}", **make_command.subprocess_kwargs),
+        mock.call("touch marker", **make_command.subprocess_kwargs),
+    ]
+
+
+def test_make_with_persistent_shell_and_asyncio_engine(tmp_path: Path) -> None:
+    make_command = get_make_command(
+        cookbook_name=COOKBOOK,
+        target="shared_state",
+        engine="asyncio",
+        variables={"DIR": str(tmp_path)},
+    )
+    make_command.make()
+    assert tmp_path.joinpath("marker").exists()
@@ -0,0 +1,56 @@
+from pathlib import Path
+
+from yamk.command.make import MakeCommand
+
+from tests.helpers import get_cookbook_command
+
+COOKBOOK = """\
+$globals:
+  version: "8.1"
+  vars:
+    sources: "{sources}"
+
+build:
+  phony: true
+  commands:
+    - echo ${{name}}
+
+{target}:
+  requires:
+    - build
+  commands:
+    - touch out
+"""
+
+
+def get_command(
+    tmp_path: Path, target: str = "out", sources: str = "", **variables: str
+) -> MakeCommand:
+    cookbook = COOKBOOK.format(target=target, sources=sources)
+    return get_cookbook_command(tmp_path, cookbook, "build", variables=variables)
+
+
+def test_recipes_are_reused(tmp_path: Path) -> None:
+    first = get_command(tmp_path, name="a")
+    second = get_command(tmp_path, name="a")
+    assert second.static_recipes["build"] is first.static_recipes["build"]
+    assert second.static_recipes is not first.static_recipes
+
+
+def test_recipes_depend_on_variables(tmp_path: Path) -> None:
+    first = get_command(tmp_path, name="a")
+    second = get_command(tmp_path, name="b")
+    assert second.static_recipes["build"] is not first.static_recipes["build"]
+
+
+def test_recipes_depend_on_the_cookbook(tmp_path: Path) -> None:
+    first = get_command(tmp_path)
+    second = get_command(tmp_path, "other")
+    assert second.static_recipes["build"] is not first.static_recipes["build"]
+    assert tmp_path.joinpath("other").as_posix() in second.static_recipes
+
+
+def test_recipes_with_filesystem_functions_are_not_reused(tmp_path: Path) -> None:
+    first = get_command(tmp_path, sources="$((glob *.yaml))")
+    second = get_command(tmp_path, sources="$((glob *.yaml))")
+    assert second.static_recipes["build"] is not first.static_recipes["build"]
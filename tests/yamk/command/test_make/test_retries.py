@@ -0,0 +1,47 @@
+from unittest import mock
+
+import pytest
+
+from tests.helpers import get_make_command, runner_exit_failure
+
+COOKBOOK = "retries.yaml"
+
+
+@mock.patch("yamk.command.make.sleep")
+@mock.patch("yamk.command.make.subprocess.run")
+def test_make_retries_with_max_backoff(
+    runner: mock.MagicMock, sleep: mock.MagicMock
+) -> None:
+    runner.side_effect = [mock.MagicMock(returncode=code) for code in (75, 75, 75, 0)]
+    make_command = get_make_command(cookbook_name=COOKBOOK, target="flaky")
+    make_command.make()
+    assert runner.call_count == 4
+    assert sleep.call_args_list == [mock.call(1), mock.call(1), mock.call(1)]
+    assert make_command.reports[0].retries == 3
+
+
+@mock.patch("yamk.command.make.sleep")
+@mock.patch("yamk.command.make.subprocess.run", new_callable=runner_exit_failure)
+def test_make_does_not_retry_other_exit_codes(
+    runner: mock.MagicMock, sleep: mock.MagicMock
+) -> None:
+    make_command = get_make_command(cookbook_name=COOKBOOK, target="fatal")
+    with pytest.raises(SystemExit) as exc_info:
+        make_command.make()
+    assert exc_info.value.code == 42
+    assert runner.call_count == 1
+    assert sleep.call_count == 0
+
+
+@mock.patch("yamk.command.make.random.uniform", return_value=0.25)
+@mock.patch("yamk.command.make.sleep")
+@mock.patch("yamk.command.make.subprocess.run", new_callable=runner_exit_failure)
+def test_make_retries_with_jitter(
+    runner: mock.MagicMock, sleep: mock.MagicMock, uniform: mock.MagicMock
+) -> None:
+    make_command = get_make_command(cookbook_name=COOKBOOK, target="jittery", retries=5)
+    with pytest.raises(SystemExit):
+        make_command.make()
+    assert runner.call_count == 2
+    assert uniform.call_args_list == [mock.call(0, 0.5)]
+    assert sleep.call_args_list == [mock.call(1.25)]
@@ -1,9 +1,26 @@
 import os
+from pathlib import Path
 from unittest import mock
 
-from tests.helpers import get_make_command, runner_exit_success
+import pytest
+
+from yamk.lib.state import State
+
+from tests.helpers import get_make_command, posix_only, runner_exit_success
 
 COOKBOOK = "should_build.yaml"
+KEEP_TS_COOKBOOK = """\
+$globals:
+  version: "8.1"
+
+{target}:
+  phony: true
+  keep_ts: true
+  requires:
+    - input.txt
+  commands:
+    - echo {output} >> log.txt
+"""
 
 
 @mock.patch("yamk.command.make.subprocess.run", new_callable=runner_exit_success)
@@ -11,9 +28,8 @@ def test_make_with_phony_and_keep_ts_newer_requirement(runner: mock.MagicMock) -
     target = "keep_ts"
     make_command = get_make_command(cookbook_name=COOKBOOK, target=target)
     make_command.phony_dir.mkdir(exist_ok=True)
-    make_command.phony_dir.joinpath(target).touch()
+    make_command.state.set("phony", target, 2_000_000_000)
     os.utime(make_command.phony_dir, times=(1, 3))
-    os.utime(make_command.phony_dir.joinpath(target), times=(1, 2))
     make_command.make()
     assert runner.call_count == 1
     calls = [mock.call("ls", **make_command.subprocess_kwargs)]
@@ -25,9 +41,8 @@ def test_make_with_phony_and_keep_ts_older_requirement(runner: mock.MagicMock) -
     target = "keep_ts"
     make_command = get_make_command(cookbook_name=COOKBOOK, target=target)
     make_command.phony_dir.mkdir(exist_ok=True)
-    make_command.phony_dir.joinpath(target).touch()
+    make_command.state.set("phony", target, 5_000_000_000)
     os.utime(make_command.phony_dir, times=(2, 3))
-    os.utime(make_command.phony_dir.joinpath(target), times=(1, 5))
     make_command.make()
     assert runner.call_count == 0
 
@@ -41,9 +56,8 @@ def test_make_with_phony_and_keep_ts_older_requirement_and_force(
         cookbook_name=COOKBOOK, target=target, force_make=True
     )
     make_command.phony_dir.mkdir(exist_ok=True)
-    make_command.phony_dir.joinpath(target).touch()
+    make_command.state.set("phony", target, 5_000_000_000)
     os.utime(make_command.phony_dir, times=(2, 3))
-    os.utime(make_command.phony_dir.joinpath(target), times=(1, 5))
     make_command.make()
     assert runner.call_count == 1
     calls = [mock.call("ls", **make_command.subprocess_kwargs)]
@@ -54,8 +68,7 @@ def test_make_with_phony_and_keep_ts_older_requirement_and_force(
 def test_make_with_phony_and_keep_ts_missing_ts(runner: mock.MagicMock) -> None:
     target = "keep_ts"
     make_command = get_make_command(cookbook_name=COOKBOOK, target=target)
-    make_command.phony_dir.mkdir(exist_ok=True)
-    make_command.phony_dir.joinpath(target).unlink(missing_ok=True)
+    make_command.state.delete("phony", target)
     make_command.make()
     assert runner.call_count == 1
     calls = [mock.call("ls", **make_command.subprocess_kwargs)]
@@ -124,8 +137,7 @@ def test_make_with_assumed_up_to_date_target(runner: mock.MagicMock) -> None:
     make_command = get_make_command(
         cookbook_name=COOKBOOK, target=target, up_to_date=[target]
     )
-    make_command.phony_dir.mkdir(exist_ok=True)
-    make_command.phony_dir.joinpath(target).unlink(missing_ok=True)
+    make_command.state.delete("phony", target)
     make_command.make()
     assert runner.call_count == 0
 
@@ -137,9 +149,8 @@ def test_make_with_update_touches_target(runner: mock.MagicMock) -> None:
     target_path = make_command.base_dir.joinpath(target)
     target_path.unlink(missing_ok=True)
     make_command.phony_dir.mkdir(exist_ok=True)
-    make_command.phony_dir.joinpath("keep_ts").touch()
+    make_command.state.set("phony", "keep_ts", 5_000_000_000)
     os.utime(make_command.phony_dir, times=(2, 3))
-    os.utime(make_command.phony_dir.joinpath("keep_ts"), times=(1, 5))
     make_command.make()
     assert runner.call_count == 1
     calls = [mock.call("echo update_ts", **make_command.subprocess_kwargs)]
@@ -200,3 +211,53 @@ def test_make_nested_requires(runner: mock.MagicMock) -> None:
         mock.call("echo two", **make_command.subprocess_kwargs),
     ]
     assert sorted(runner.call_args_list) == sorted(calls)
+
+
+@mock.patch("yamk.command.make.subprocess.run", new_callable=runner_exit_success)
+def test_make_with_phony_and_keep_ts_legacy_file(runner: mock.MagicMock) -> None:
+    target = "keep_ts"
+    make_command = get_make_command(cookbook_name=COOKBOOK, target=target)
+    make_command.state.delete("phony", target)
+    make_command.state.save()
+    legacy_path = make_command.phony_dir.joinpath(target)
+    legacy_path.touch()
+    os.utime(make_command.phony_dir, times=(2, 3))
+    os.utime(legacy_path, times=(1, 5))
+    make_command.make()
+    assert runner.call_count == 0
+    assert not legacy_path.exists()
+    state = State(make_command.state.path)
+    assert state.get("phony", target) == 5_000_000_000
+
+
+@mock.patch("yamk.command.make.subprocess.run", new_callable=runner_exit_success)
+def test_make_drops_stale_phony_timestamps(runner: mock.MagicMock) -> None:
+    target = "keep_ts"
+    make_command = get_make_command(cookbook_name=COOKBOOK, target=target)
+    make_command.state.set("phony", "removed", 1)
+    make_command.state.set("phony", "exists_only", 1)
+    make_command.make()
+    assert runner.call_count == 1
+    state = State(make_command.state.path)
+    assert state.get("phony", "removed") is None
+    assert state.get("phony", "exists_only") is None
+    assert state.get("phony", target) is not None
+
+
+@posix_only
+@pytest.mark.parametrize("other_target", ["other", "setup"])
+def test_cookbooks_keep_separate_state(other_target: str, tmp_path: Path) -> None:
+    first = tmp_path.joinpath("a.yaml")
+    first.write_text(KEEP_TS_COOKBOOK.format(target="setup", output="SETUP-A"))
+    second = tmp_path.joinpath("b.yaml")
+    second.write_text(KEEP_TS_COOKBOOK.format(target=other_target, output="OTHER-B"))
+    source = tmp_path.joinpath("input.txt")
+    source.touch()
+    os.utime(source, ns=(10**9, 10**9))
+    log = tmp_path.joinpath("log.txt")
+
+    get_make_command(target="setup", cookbook=first).make()
+    get_make_command(target=other_target, cookbook=second).make()
+    get_make_command(target="setup", cookbook=first).make()
+    get_make_command(target=other_target, cookbook=second).make()
+    assert log.read_text().split() == ["SETUP-A", "OTHER-B"]
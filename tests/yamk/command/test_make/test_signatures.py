@@ -0,0 +1,65 @@
+import os
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from tests.helpers import get_cookbook_command, runner_exit_success
+
+COOKBOOK = """\
+$globals:
+  version: "8.1"
+
+out.txt:
+  requires:
+    - in.txt
+  env_inputs:
+    - CFLAGS
+  commands:
+    - cp in.txt out.txt
+"""
+
+
+@pytest.fixture(autouse=True)
+def built(tmp_path: Path) -> None:
+    tmp_path.joinpath("in.txt").write_text("content")
+    tmp_path.joinpath("out.txt").write_text("content")
+    os.utime(tmp_path.joinpath("in.txt"), ns=(10**9, 10**9))
+    with mock.patch.dict(os.environ, {"CFLAGS": "-O2"}):
+        get_cookbook_command(tmp_path, COOKBOOK, variables={"opt": "1"}).make()
+
+
+@mock.patch.dict(os.environ, {"CFLAGS": "-O2"})
+@mock.patch("yamk.command.make.subprocess.run", new_callable=runner_exit_success)
+def test_unchanged_signature_does_not_rebuild(
+    runner: mock.MagicMock, tmp_path: Path
+) -> None:
+    get_cookbook_command(tmp_path, COOKBOOK, variables={"opt": "1"}).make()
+    assert runner.call_count == 0
+
+
+@mock.patch.dict(os.environ, {"CFLAGS": "-O2"})
+@mock.patch("yamk.command.make.subprocess.run", new_callable=runner_exit_success)
+def test_changed_command_rebuilds(runner: mock.MagicMock, tmp_path: Path) -> None:
+    cookbook = COOKBOOK.replace("cp in.txt out.txt", "cp -p in.txt out.txt")
+    get_cookbook_command(tmp_path, cookbook, variables={"opt": "1"}).make()
+    assert runner.call_count == 1
+    get_cookbook_command(tmp_path, cookbook, variables={"opt": "1"}).make()
+    assert runner.call_count == 1
+
+
+@mock.patch.dict(os.environ, {"CFLAGS": "-O2"})
+@mock.patch("yamk.command.make.subprocess.run", new_callable=runner_exit_success)
+def test_changed_variable_rebuilds(runner: mock.MagicMock, tmp_path: Path) -> None:
+    cookbook = COOKBOOK.replace("cp in.txt out.txt", "cp in.txt out.txt.${opt}")
+    get_cookbook_command(tmp_path, cookbook, variables={"opt": "1"}).make()
+    assert runner.call_count == 1
+    get_cookbook_command(tmp_path, cookbook, variables={"opt": "2"}).make()
+    assert runner.call_count == 2
+
+
+@mock.patch.dict(os.environ, {"CFLAGS": "-O3"})
+@mock.patch("yamk.command.make.subprocess.run", new_callable=runner_exit_success)
+def test_changed_env_input_rebuilds(runner: mock.MagicMock, tmp_path: Path) -> None:
+    get_cookbook_command(tmp_path, COOKBOOK, variables={"opt": "1"}).make()
+    assert runner.call_count == 1
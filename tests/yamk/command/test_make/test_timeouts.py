@@ -0,0 +1,76 @@
+from collections.abc import Iterator
+from pathlib import Path
+from time import sleep
+from typing import Literal
+
+import pytest
+
+from yamk.lib.shell import TIMED_OUT
+
+from tests.helpers import TEST_DATA_ROOT, get_make_command, posix_only
+
+pytestmark = posix_only
+
+COOKBOOK = "timeouts.yaml"
+
+
+@pytest.fixture
+def late_file() -> Iterator[Path]:
+    path = TEST_DATA_ROOT.joinpath("late")
+    yield path
+    path.unlink(missing_ok=True)
+
+
+@pytest.mark.parametrize("engine", ["subprocess", "asyncio"])
+def test_recipe_timeout_kills_the_process_group(
+    engine: Literal["subprocess", "asyncio"], late_file: Path
+) -> None:
+    make_command = get_make_command(
+        cookbook_name=COOKBOOK, target="recipe_timeout", engine=engine
+    )
+    with pytest.raises(SystemExit) as exc_info:
+        make_command.make()
+    assert exc_info.value.code == TIMED_OUT
+    [report] = make_command.reports
+    assert report.timed_out
+    assert not report.success
+    sleep(0.6)
+    assert not late_file.exists()
+
+
+@pytest.mark.parametrize("engine", ["subprocess", "asyncio"])
+def test_command_timeout_overrides_recipe_timeout(
+    engine: Literal["subprocess", "asyncio"],
+) -> None:
+    make_command = get_make_command(
+        cookbook_name=COOKBOOK, target="command_timeout", engine=engine
+    )
+    with pytest.raises(SystemExit) as exc_info:
+        make_command.make()
+    assert exc_info.value.code == TIMED_OUT
+    assert make_command.reports[0].timed_out
+
+
+def test_commands_within_the_timeout_succeed() -> None:
+    make_command = get_make_command(cookbook_name=COOKBOOK, target="fast_enough")
+    make_command.make()
+    [report] = make_command.reports
+    assert report.success
+    assert not report.timed_out
+
+
+@pytest.mark.parametrize("engine", ["subprocess", "asyncio"])
+def test_persistent_shell_timeout(engine: Literal["subprocess", "asyncio"]) -> None:
+    make_command = get_make_command(
+        cookbook_name=COOKBOOK, target="session_timeout", engine=engine
+    )
+    with pytest.raises(SystemExit) as exc_info:
+        make_command.make()
+    assert exc_info.value.code == TIMED_OUT
+    assert make_command.reports[0].timed_out
+
+
+def test_allowed_timeout_does_not_fail_the_target() -> None:
+    make_command = get_make_command(cookbook_name=COOKBOOK, target="allowed_timeout")
+    make_command.make()
+    assert make_command.reports[0].timed_out
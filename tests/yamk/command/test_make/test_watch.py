@@ -0,0 +1,117 @@
+import os
+import time
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from yamk.command.make import MakeCommand
+
+from tests.helpers import get_make_command, runner_exit_success
+
+COOKBOOK = """\
+$globals:
+  version: "8.1"
+
+out.txt:
+  requires:
+    - in.txt
+  commands:
+    - cp in.txt out.txt
+
+other.txt:
+  requires:
+    - unrelated.txt
+  commands:
+    - cp unrelated.txt other.txt
+
+all:
+  phony: true
+  requires:
+    - out.txt
+    - other.txt
+  commands:
+    - cat out.txt other.txt
+"""
+
+
+@pytest.fixture
+def make_command(tmp_path: Path) -> MakeCommand:
+    cookbook = tmp_path.joinpath("cookbook.yaml")
+    cookbook.write_text(COOKBOOK)
+    tmp_path.joinpath("in.txt").write_text("first")
+    tmp_path.joinpath("unrelated.txt").write_text("unrelated")
+    return get_make_command(target="all", cookbook=cookbook)
+
+
+def test_watch_rebuilds_changed_requirements(
+    make_command: MakeCommand, tmp_path: Path
+) -> None:
+    source = tmp_path.joinpath("in.txt")
+    output = tmp_path.joinpath("out.txt")
+    deadline = time.monotonic() + 10
+
+    def wait() -> None:
+        if time.monotonic() > deadline:
+            raise KeyboardInterrupt
+        time.sleep(0.01)
+        if output.exists() and output.read_text() == "first":
+            source.write_text("second")
+            os.utime(source, ns=(output.stat().st_mtime_ns + 10**9,) * 2)
+        elif output.exists() and output.read_text() == "second":
+            raise KeyboardInterrupt
+
+    with mock.patch("yamk.lib.watch.Watcher.wait", side_effect=wait):
+        make_command.watch()
+    assert output.read_text() == "second"
+    commands = [report.command for report in make_command.reports]
+    assert commands == ["cp in.txt out.txt", "cat out.txt other.txt"]
+
+
+@mock.patch("yamk.command.make.subprocess.run", new_callable=runner_exit_success)
+def test_cancelled_rebuild_runs_no_commands(
+    runner: mock.MagicMock, make_command: MakeCommand
+) -> None:
+    dag = make_command._preprocess_target()
+    make_command.cancelled.set()
+    assert not make_command._rebuild(dag, set())
+    assert runner.call_count == 0
+    assert not any(node.should_build for node in dag)
+
+
+@mock.patch("yamk.command.make.subprocess.run", new_callable=runner_exit_success)
+def test_rebuild_only_checks_affected_targets(
+    runner: mock.MagicMock, make_command: MakeCommand, tmp_path: Path
+) -> None:
+    dag = make_command._preprocess_target()
+    for node in dag:
+        node.should_build = False
+    source = dag[tmp_path.joinpath("in.txt").as_posix()]
+    tmp_path.joinpath("out.txt").write_text("")
+    os.utime(source.target, ns=(time.time_ns() + 10**9,) * 2)
+    with mock.patch.object(
+        make_command, "_should_build", wraps=make_command._should_build
+    ) as should_build:
+        assert make_command._rebuild(dag, {source})
+    checked = {call.args[0].target for call in should_build.call_args_list}
+    assert tmp_path.joinpath("other.txt").as_posix() not in checked
+    assert [call.args[0] for call in runner.call_args_list] == [
+        "cp in.txt out.txt",
+        "cat out.txt other.txt",
+    ]
+
+
+@mock.patch("yamk.command.make.subprocess.run", new_callable=runner_exit_success)
+def test_rebuild_resets_timings(
+    runner: mock.MagicMock, make_command: MakeCommand, tmp_path: Path
+) -> None:
+    dag = make_command._preprocess_target()
+    source = dag[tmp_path.joinpath("in.txt").as_posix()]
+    tmp_path.joinpath("out.txt").write_text("")
+    for _ in range(2):
+        os.utime(source.target, ns=(time.time_ns() + 10**9,) * 2)
+        assert make_command._rebuild(dag, {source})
+    assert runner.call_args.args[0] == "cat out.txt other.txt"
+    assert len(make_command.reports) == 2
+    out = tmp_path.joinpath("out.txt").as_posix()
+    assert make_command.timings[out] == make_command.reports[0].timing.nanoseconds
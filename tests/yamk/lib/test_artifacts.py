@@ -0,0 +1,145 @@
+import os
+import shutil
+import socketserver
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+
+from yamk.lib.artifacts import ArtifactCache, Backend, artifact_key, get_backend
+
+from tests.helpers import cache_server
+
+
+def test_artifact_key_is_stable() -> None:
+    assert artifact_key(a=1, b=[2]) == artifact_key(b=[2], a=1)
+    assert artifact_key(a=1) != artifact_key(a=2)
+
+
+def test_artifact_cache_round_trip(tmp_path: Path) -> None:
+    cache = ArtifactCache(tmp_path.joinpath("cache"))
+    output = tmp_path.joinpath("out.txt")
+    output.write_text("content")
+    cache.store("abcd", output)
+    output.unlink()
+    assert cache.restore("abcd", output)
+    assert output.read_text() == "content"
+
+
+def test_artifact_cache_restores_directories(tmp_path: Path) -> None:
+    cache = ArtifactCache(tmp_path.joinpath("cache"))
+    output = tmp_path.joinpath("out")
+    output.joinpath("nested").mkdir(parents=True)
+    output.joinpath("nested", "file").write_text("content")
+    cache.store("abcd", output)
+    output.joinpath("nested", "file").write_text("stale")
+    output.joinpath("extra").touch()
+    assert cache.restore("abcd", output)
+    assert output.joinpath("nested", "file").read_text() == "content"
+    assert not output.joinpath("extra").exists()
+
+
+def test_artifact_cache_misses(tmp_path: Path) -> None:
+    cache = ArtifactCache(tmp_path.joinpath("cache"))
+    assert not cache.restore("abcd", tmp_path.joinpath("out.txt"))
+    cache.store("abcd", tmp_path.joinpath("missing"))
+    assert not cache.restore("abcd", tmp_path.joinpath("out.txt"))
+
+
+def test_artifact_cache_hardlinks(tmp_path: Path) -> None:
+    cache = ArtifactCache(tmp_path.joinpath("cache"), hardlink=True)
+    output = tmp_path.joinpath("out.txt")
+    output.write_text("content")
+    cache.store("abcd", output)
+    restored = tmp_path.joinpath("restored.txt")
+    assert cache.restore("abcd", restored)
+    assert (
+        restored.stat().st_ino == cache.directory.joinpath("ab", "abcd").stat().st_ino
+    )
+    assert restored.stat().st_ino != output.stat().st_ino
+
+
+def test_artifact_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    cache = ArtifactCache(tmp_path.joinpath("cache"), max_size=10)
+    output = tmp_path.joinpath("out.txt")
+    for index, key in enumerate(["aaaa", "bbbb"]):
+        output.write_text("12345")
+        cache.store(key, output)
+        os.utime(cache.directory.joinpath(key[:2], key), ns=(index, index))
+    assert cache.restore("aaaa", output)
+    output.write_text("67890")
+    cache.store("cccc", output)
+    assert cache.directory.joinpath("aa", "aaaa").exists()
+    assert not cache.directory.joinpath("bb", "bbbb").exists()
+    assert cache.directory.joinpath("cc", "cccc").exists()
+
+
+@pytest.fixture(params=["directory", "http"])
+def remote(request: pytest.FixtureRequest, tmp_path: Path) -> Iterator[Backend]:
+    if request.param == "directory":
+        yield get_backend("remote", tmp_path)
+        return
+    with cache_server() as server:
+        host, port = server.server_address[:2]
+        yield get_backend(f"http://{host!s}:{port}/cache", tmp_path)
+
+
+def test_artifact_cache_shares_outputs_through_the_remote(
+    remote: Backend, tmp_path: Path
+) -> None:
+    output = tmp_path.joinpath("out")
+    output.mkdir()
+    output.joinpath("file").write_text("content")
+    first = ArtifactCache(tmp_path.joinpath("first"), remote=remote)
+    first.store("abcd", output)
+    first.wait()
+
+    shutil.rmtree(output)
+    second = ArtifactCache(tmp_path.joinpath("second"), remote=remote)
+    assert second.restore("abcd", output)
+    assert output.joinpath("file").read_text() == "content"
+    assert not second.restore("efgh", tmp_path.joinpath("other"))
+
+
+def test_artifact_cache_ignores_remote_failures(tmp_path: Path) -> None:
+    remote = get_backend("http://127.0.0.1:9/cache", tmp_path)
+    output = tmp_path.joinpath("out.txt")
+    output.write_text("content")
+    cache = ArtifactCache(tmp_path.joinpath("cache"), remote=remote)
+    cache.store("abcd", output)
+    cache.wait()
+    assert not cache.restore("efgh", output)
+    assert output.read_text() == "content"
+
+
+class GarbageHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        self.rfile.readline()
+        self.wfile.write(b"garbage\r\n\r\n")
+
+
+@contextmanager
+def garbage_server() -> Iterator[socketserver.ThreadingTCPServer]:
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), GarbageHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_artifact_cache_ignores_malformed_responses(tmp_path: Path) -> None:
+    output = tmp_path.joinpath("out.txt")
+    output.write_text("content")
+    with garbage_server() as server:
+        host, port = server.server_address[:2]
+        remote = get_backend(f"http://{host!s}:{port}/cache", tmp_path)
+        cache = ArtifactCache(tmp_path.joinpath("cache"), remote=remote)
+        cache.store("abcd", output)
+        cache.wait()
+        assert not cache.restore("efgh", output)
+    assert output.read_text() == "content"
@@ -0,0 +1,72 @@
+import os
+from pathlib import Path
+from unittest import mock
+
+from dj_settings import ConfigParser
+
+from yamk.lib.cookbook import COOKBOOKS, cache_path, cookbook_signature, load_cookbook
+
+
+def test_load_cookbook_returns_copies(tmp_path: Path) -> None:
+    cookbook = tmp_path.joinpath("cookbook.json")
+    cookbook.write_text('{"target": {"phony": true}}')
+    data = load_cookbook(cookbook, None)
+    data.pop("target")
+    assert load_cookbook(cookbook, None) == {"target": {"phony": True}}
+
+
+def test_load_cookbook_reloads_changed_cookbook(tmp_path: Path) -> None:
+    cookbook = tmp_path.joinpath("cookbook.json")
+    cookbook.write_text('{"target": {"phony": true}}')
+    assert load_cookbook(cookbook, None) == {"target": {"phony": True}}
+    cookbook.write_text('{"target": {"phony": false}}')
+    assert load_cookbook(cookbook, None) == {"target": {"phony": False}}
+
+
+def test_cookbook_signature_tracks_overrides(tmp_path: Path) -> None:
+    cookbook = tmp_path.joinpath("cookbook.json")
+    cookbook.write_text("{}")
+    signature = cookbook_signature(cookbook)
+    override_dir = tmp_path.joinpath("cookbook.json.d")
+    override_dir.mkdir()
+    override = override_dir.joinpath("local.json")
+    override.write_text("{}")
+    os.utime(override, ns=(0, 0))
+    assert cookbook_signature(cookbook) != signature
+    assert cookbook_signature(cookbook)[-1] == (override.as_posix(), 0, 2)
+
+
+def test_load_cookbook_reuses_the_cache(tmp_path: Path) -> None:
+    cookbook = tmp_path.joinpath("cookbook.json")
+    cookbook.write_text('{"target": {"phony": true}}')
+    load_cookbook(cookbook, None)
+    assert cache_path(cookbook).exists()
+    COOKBOOKS.clear()
+    with mock.patch("yamk.lib.cookbook.ConfigParser") as parser:
+        assert load_cookbook(cookbook, None) == {"target": {"phony": True}}
+    parser.assert_not_called()
+
+
+def test_load_cookbook_ignores_stale_cache(tmp_path: Path) -> None:
+    cookbook = tmp_path.joinpath("cookbook.json")
+    cookbook.write_text('{"target": {"phony": true}}')
+    load_cookbook(cookbook, None)
+    COOKBOOKS.clear()
+    cookbook.write_text('{"target": {"phony": false}}')
+    assert load_cookbook(cookbook, None) == {"target": {"phony": False}}
+    COOKBOOKS.clear()
+    with (
+        mock.patch("yamk.lib.cookbook.__version__", "0.0.0"),
+        mock.patch("yamk.lib.cookbook.ConfigParser", wraps=ConfigParser) as parser,
+    ):
+        assert load_cookbook(cookbook, None) == {"target": {"phony": False}}
+    parser.assert_called_once()
+
+
+def test_load_cookbook_ignores_corrupt_cache(tmp_path: Path) -> None:
+    cookbook = tmp_path.joinpath("cookbook.json")
+    cookbook.write_text('{"target": {"phony": true}}')
+    load_cookbook(cookbook, None)
+    COOKBOOKS.clear()
+    cache_path(cookbook).write_bytes(b"corrupt")
+    assert load_cookbook(cookbook, None) == {"target": {"phony": True}}
@@ -0,0 +1,108 @@
+import os
+import subprocess
+import sys
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from yamk.lib.cli import CliArgs
+from yamk.lib.daemon import Daemon, request, socket_path
+
+from tests.helpers import posix_only
+
+pytestmark = posix_only
+
+COOKBOOK = """\
+$globals:
+  version: "8.1"
+
+marker:
+  phony: true
+  commands:
+    - printf '%s' "${VALUE}" > marker
+"""
+
+
+def get_args(cookbook: Path, **kwargs: object) -> CliArgs:
+    values: dict[str, object] = {
+        "bare": False,
+        "cookbook": cookbook,
+        "cookbook_type": None,
+        "daemon": False,
+        "dry_run": False,
+        "echo_override": False,
+        "engine": "subprocess",
+        "extra": [],
+        "force_make": False,
+        "jobs": 1,
+        "jobserver_style": "pipe",
+        "keep_going": False,
+        "max_load": None,
+        "min_free_memory": None,
+        "print_timing_report": False,
+        "retries": 0,
+        "schedule": "c3",
+        "shell": None,
+        "target": "marker",
+        "up_to_date": [],
+        "variables": {},
+        "verbosity": 0,
+        "watch": False,
+    }
+    values.update(kwargs)
+    return CliArgs(**values)  # type: ignore[arg-type]
+
+
+@pytest.fixture
+def cookbook(tmp_path: Path) -> Iterator[Path]:
+    cookbook = tmp_path.joinpath("cookbook.yaml")
+    cookbook.write_text(COOKBOOK)
+    daemon = subprocess.Popen(  # noqa: S603
+        [
+            sys.executable,
+            "-c",
+            "from yamk.__main__ import main; main()",
+            "--daemon",
+            "-d",
+            str(tmp_path),
+        ]
+    )
+    path = socket_path(cookbook)
+    for _ in range(500):
+        if path.is_socket():
+            break
+        time.sleep(0.01)
+    try:
+        yield cookbook
+    finally:
+        daemon.terminate()
+        daemon.wait()
+
+
+def test_request_without_daemon(tmp_path: Path) -> None:
+    assert request(get_args(tmp_path.joinpath("cookbook.yaml"))) is None
+
+
+def test_request_builds_in_daemon(cookbook: Path) -> None:
+    args = get_args(cookbook, variables={"VALUE": "served"})
+    assert request(args) == 0
+    assert cookbook.parent.joinpath("marker").read_text() == "served"
+
+
+def test_request_returns_failure_status(cookbook: Path) -> None:
+    assert request(get_args(cookbook, target="missing")) == 1
+
+
+def test_daemon_warms_with_the_request_environment(tmp_path: Path) -> None:
+    environments: list[str | None] = []
+
+    def warm(_args: CliArgs) -> None:
+        environments.append(os.environ.get("YAMK_WARM"))
+
+    cookbook = tmp_path.joinpath("cookbook.yaml")
+    daemon = Daemon(cookbook, build=lambda _args: None, warm=warm)
+    daemon._warm(get_args(cookbook), {"YAMK_WARM": "request"})
+    assert environments == ["request"]
+    assert "YAMK_WARM" not in os.environ
@@ -0,0 +1,151 @@
+import hashlib
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
+from unittest import mock
+
+import pytest
+
+from yamk.lib.fs import Fingerprints, StatCache, newest_mtime
+from yamk.lib.state import State
+
+if TYPE_CHECKING:
+    from yamk.lib.type_defs import JSONType
+
+
+def test_fingerprints_digest_files(tmp_path: Path) -> None:
+    path = tmp_path.joinpath("file")
+    path.write_bytes(b"content")
+    fingerprints = Fingerprints(State(tmp_path.joinpath("state.json")), StatCache())
+    assert fingerprints.digest(path) == hashlib.blake2b(b"content").hexdigest()
+
+
+def test_fingerprints_skip_missing_files_and_directories(tmp_path: Path) -> None:
+    fingerprints = Fingerprints(State(tmp_path.joinpath("state.json")), StatCache())
+    assert fingerprints.digest(tmp_path) is None
+    assert fingerprints.digest(tmp_path.joinpath("missing")) is None
+
+
+@mock.patch("yamk.lib.fs.hashlib.file_digest", wraps=hashlib.file_digest)
+def test_fingerprints_rehash_only_changed_files(
+    file_digest: mock.MagicMock, tmp_path: Path
+) -> None:
+    path = tmp_path.joinpath("file")
+    path.write_bytes(b"content")
+    state = State(tmp_path.joinpath("state.json"))
+    Fingerprints(state, StatCache()).digest(path)
+    state.save()
+
+    stats = StatCache()
+    fingerprints = Fingerprints(State(state.path), stats)
+    fingerprints.digest(path)
+    assert file_digest.call_count == 1
+
+    path.write_bytes(b"changed")
+    os.utime(path, ns=(1, 1))
+    stats.invalidate(path)
+    assert fingerprints.digest(path) == hashlib.blake2b(b"changed").hexdigest()
+    assert file_digest.call_count == 2
+
+
+def test_stat_cache_stats_each_path_once(tmp_path: Path) -> None:
+    path = tmp_path.joinpath("file")
+    path.touch()
+    os.utime(path, ns=(1, 123456789))
+    stats = StatCache()
+    with mock.patch.object(Path, "stat", autospec=True, side_effect=Path.stat) as stat:
+        assert stats.exists(path)
+        assert stats.mtime_ns(path) == 123456789
+        assert not stats.exists(tmp_path.joinpath("missing"))
+        assert not stats.exists(tmp_path.joinpath("missing"))
+    assert stat.call_count == 2
+
+
+def test_stat_cache_raises_for_missing_paths(tmp_path: Path) -> None:
+    with pytest.raises(FileNotFoundError):
+        StatCache().mtime_ns(tmp_path.joinpath("missing"))
+
+
+def test_stat_cache_invalidates_paths_and_their_children(tmp_path: Path) -> None:
+    directory = tmp_path.joinpath("directory")
+    directory.mkdir()
+    child = directory.joinpath("child")
+    sibling = tmp_path.joinpath("directory.txt")
+    stats = StatCache()
+    assert not stats.exists(child)
+    assert not stats.exists(sibling)
+    child.touch()
+    sibling.touch()
+    stats.invalidate(directory)
+    assert stats.exists(child)
+    assert not stats.exists(sibling)
+
+
+@pytest.fixture
+def tree(tmp_path: Path) -> Path:
+    for index, name in enumerate(["a/b/c", "a/d", ".git/objects", "e"], start=1):
+        path = tmp_path.joinpath(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+        os.utime(path, ns=(index, index * 10))
+    for directory in ["a/b", "a", ".git", "."]:
+        os.utime(tmp_path.joinpath(directory), ns=(1, 1))
+    return tmp_path
+
+
+def test_newest_mtime_walks_the_whole_tree(tree: Path) -> None:
+    assert newest_mtime(tree) == 40
+
+
+def test_newest_mtime_skips_ignored_entries(tree: Path) -> None:
+    assert newest_mtime(tree, ignore=[".git", "e"]) == 20
+
+
+@mock.patch("yamk.lib.fs.ThreadPoolExecutor")
+def test_newest_mtime_stops_at_the_first_newer_entry(
+    executor: mock.MagicMock, tree: Path
+) -> None:
+    assert newest_mtime(tree, stop_at=40) == 40
+    assert executor.call_count == 0
+
+
+def test_newest_mtime_reuses_the_index_of_unchanged_directories(tree: Path) -> None:
+    index: dict[str, JSONType] = {}
+    assert newest_mtime(tree, index=index) == 40
+    with mock.patch("yamk.lib.fs.os.scandir", wraps=os.scandir) as scandir:
+        assert newest_mtime(tree, index=index) == 40
+    assert scandir.call_count == 0
+
+
+def test_newest_mtime_rescans_changed_directories(tree: Path) -> None:
+    index: dict[str, JSONType] = {}
+    newest_mtime(tree, index=index)
+    new_file = tree.joinpath("a", "b", "new")
+    new_file.touch()
+    os.utime(new_file, ns=(1, 50))
+    os.utime(new_file.parent, ns=(1, 2))
+    with mock.patch("yamk.lib.fs.os.scandir", wraps=os.scandir) as scandir:
+        assert newest_mtime(tree, index=index) == 50
+    assert scandir.call_args_list == [mock.call(new_file.parent.as_posix())]
+
+
+def test_fingerprints_digest_trees(tmp_path: Path) -> None:
+    nested = tmp_path.joinpath("dir", "nested")
+    nested.mkdir(parents=True)
+    nested.joinpath("file").write_bytes(b"content")
+    tmp_path.joinpath("dir", "skipped").write_bytes(b"content")
+    fingerprints = Fingerprints(State(tmp_path.joinpath("state.json")), StatCache())
+    digest = fingerprints.tree_digest(tmp_path.joinpath("dir"), ignore=["skipped"])
+
+    tmp_path.joinpath("dir", "skipped").write_bytes(b"changed")
+    fingerprints = Fingerprints(State(tmp_path.joinpath("state.json")), StatCache())
+    assert fingerprints.tree_digest(tmp_path.joinpath("dir"), ignore=["skipped"]) == (
+        digest
+    )
+
+    nested.joinpath("file").write_bytes(b"changed")
+    os.utime(nested.joinpath("file"), ns=(1, 1))
+    fingerprints = Fingerprints(State(tmp_path.joinpath("state.json")), StatCache())
+    assert fingerprints.tree_digest(tmp_path.joinpath("dir"), ignore=["skipped"]) != (
+        digest
+    )
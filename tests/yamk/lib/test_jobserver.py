@@ -0,0 +1,107 @@
+import os
+from unittest import mock
+
+import pytest
+
+from yamk.lib.jobserver import Jobserver
+
+from tests.helpers import posix_only
+
+pytestmark = posix_only
+
+
+def test_jobserver_creates_pipe_with_tokens() -> None:
+    jobserver = Jobserver.create(3)
+    assert jobserver is not None
+    with jobserver:
+        read_fd, write_fd = jobserver.pass_fds
+        auth = f"{read_fd},{write_fd}"
+        assert jobserver.makeflags.endswith(
+            f"-j3 --jobserver-fds={auth} --jobserver-auth={auth}"
+        )
+        assert os.get_inheritable(read_fd)
+        assert os.get_inheritable(write_fd)
+        assert jobserver.acquire()
+        assert jobserver.acquire()
+        assert not jobserver.acquire()
+    with pytest.raises(OSError, match="Bad file descriptor"):
+        os.fstat(read_fd)
+
+
+def test_jobserver_creates_fifo_with_tokens() -> None:
+    jobserver = Jobserver.create(3, style="fifo")
+    assert jobserver is not None
+    with jobserver:
+        assert "-j3 --jobserver-auth=fifo:" in jobserver.makeflags
+        assert jobserver.acquire()
+        assert jobserver.acquire()
+        assert not jobserver.acquire()
+        assert jobserver.tokens == [b"+", b"+"]
+        jobserver.release()
+        assert jobserver.tokens == [b"+"]
+        directory = jobserver._directory
+    assert directory is not None
+    assert not directory.exists()
+
+
+def test_jobserver_client_uses_inherited_fifo() -> None:
+    server = Jobserver.create(2, style="fifo")
+    assert server is not None
+    with server:
+        client = Jobserver.from_makeflags(server.makeflags)
+        assert client is not None
+        with client:
+            assert client.jobs == 2
+            assert client.acquire()
+            assert not server.acquire()
+        assert server.acquire()
+
+
+def test_jobserver_client_uses_inherited_pipe() -> None:
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, b"ab")
+    try:
+        with mock.patch("yamk.lib.jobserver.os.open") as open_fd:
+            client = Jobserver.from_makeflags(
+                f"k -j4 --jobserver-auth={read_fd},{write_fd}"
+            )
+        open_fd.assert_not_called()
+        assert client is not None
+        with client:
+            assert client.jobs == 4
+            assert client.pass_fds == (read_fd, write_fd)
+            assert client.acquire()
+            assert client.tokens == [b"a"]
+            assert client.acquire()
+            assert not client.acquire()
+        assert os.read(read_fd, 2) == b"ba"
+    finally:
+        os.close(read_fd)
+        os.close(write_fd)
+
+
+def test_jobserver_client_ignores_closed_fds() -> None:
+    read_fd, write_fd = os.pipe()
+    os.close(read_fd)
+    os.close(write_fd)
+    makeflags = f"-j2 --jobserver-auth={read_fd},{write_fd}"
+    assert Jobserver.from_makeflags(makeflags) is None
+
+
+def test_jobserver_client_without_auth() -> None:
+    assert Jobserver.from_makeflags("-k -j4") is None
+
+
+def test_jobserver_client_does_not_block_without_tokens() -> None:
+    read_fd, write_fd = os.pipe()
+    try:
+        client = Jobserver.from_makeflags(f"-j2 --jobserver-auth={read_fd},{write_fd}")
+        assert client is not None
+        with client:
+            assert not client.acquire()
+            os.write(write_fd, b"+")
+            assert client.acquire()
+            assert not client.acquire()
+    finally:
+        os.close(read_fd)
+        os.close(write_fd)
@@ -19,3 +19,28 @@ def test_yamk_verbosity(verbose: str, expected_verbosity: int) -> None:
         args = parse_args()
 
     assert args.verbosity == expected_verbosity
+
+
+@pytest.mark.parametrize(
+    ("argv", "expected_jobs", "expected_target", "expected_extra"),
+    [
+        (["-j", "3", "target"], 3, "target", []),
+        (["-j", "target"], 8, "target", []),
+        (["-j", "target", "extra"], 8, "target", ["extra"]),
+        (["--jobs", "target"], 8, "target", []),
+        (["target"], 1, "target", []),
+    ],
+)
+@mock.patch("yamk.lib.cli.os.cpu_count", new=mock.MagicMock(return_value=8))
+def test_parse_jobs(
+    argv: list[str],
+    expected_jobs: int,
+    expected_target: str,
+    expected_extra: list[str],
+) -> None:
+    with mock.patch("sys.argv", ["yamk", *argv]):
+        args = parse_args()
+
+    assert args.jobs == expected_jobs
+    assert args.target == expected_target
+    assert args.extra == expected_extra
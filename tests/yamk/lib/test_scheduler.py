@@ -0,0 +1,287 @@
+import asyncio
+import threading
+import time
+from pathlib import Path
+from unittest import mock
+
+from yamk.lib.jobserver import Jobserver
+from yamk.lib.scheduler import Resources, Scheduler, Throttle
+from yamk.lib.utils import DAG, Node
+
+from tests.helpers import posix_only
+
+
+def get_dag(edges: dict[str, list[str]], built: set[str] | None = None) -> DAG:
+    nodes = {target: Node(target=target) for target in edges}
+    for target, requirements in edges.items():
+        for requirement in requirements:
+            nodes[target].add_requirement(nodes[requirement])
+    dag = DAG(nodes["root"])
+    for node in nodes.values():
+        dag.add_node(node)
+        node.should_build = built is None or node.target in built
+    dag.sort()
+    return dag
+
+
+EDGES = {
+    "root": ["a", "b"],
+    "a": ["c"],
+    "b": ["c"],
+    "c": [],
+}
+
+
+def test_serial_scheduler_follows_c3_order() -> None:
+    order: list[str] = []
+
+    def build(node: Node) -> int:
+        order.append(node.target)
+        return 0
+
+    dag = get_dag(EDGES)
+    status = Scheduler(dag, jobs=1).run(build)
+    assert status == 0
+    assert order == [node.target for node in dag]
+
+
+def test_serial_scheduler_skips_up_to_date_nodes() -> None:
+    order: list[str] = []
+
+    def build(node: Node) -> int:
+        order.append(node.target)
+        return 0
+
+    dag = get_dag(EDGES, built={"root", "b"})
+    Scheduler(dag, jobs=1).run(build)
+    assert order == ["b", "root"]
+
+
+def test_parallel_scheduler_runs_independent_nodes_together() -> None:
+    barrier = threading.Barrier(2, timeout=5)
+    order: list[str] = []
+
+    def build(node: Node) -> int:
+        if node.target in {"a", "b"}:
+            barrier.wait()
+        order.append(node.target)
+        return 0
+
+    status = Scheduler(get_dag(EDGES), jobs=2).run(build)
+    assert status == 0
+    assert order[0] == "c"
+    assert set(order[1:3]) == {"a", "b"}
+    assert order[3] == "root"
+
+
+def test_parallel_scheduler_returns_first_failure() -> None:
+    order: list[str] = []
+
+    def build(node: Node) -> int:
+        order.append(node.target)
+        return 3 if node.target == "c" else 0
+
+    status = Scheduler(get_dag(EDGES), jobs=4).run(build)
+    assert status == 3
+    assert order == ["c"]
+
+
+def test_critical_path_starts_longest_chain_first() -> None:
+    order: list[str] = []
+
+    def build(node: Node) -> int:
+        order.append(node.target)
+        return 0
+
+    edges = {"root": ["a", "b"], "a": [], "b": []}
+    timings = {"root": 1, "a": 1, "b": 10}
+    scheduler = Scheduler(
+        get_dag(edges), jobs=1, schedule="critical-path", timings=timings
+    )
+    scheduler.run(build)
+    assert order == ["b", "a", "root"]
+
+
+def test_critical_path_uses_average_for_unknown_targets() -> None:
+    order: list[str] = []
+
+    def build(node: Node) -> int:
+        order.append(node.target)
+        return 0
+
+    edges = {"root": ["a", "b", "c"], "a": [], "b": [], "c": []}
+    timings = {"a": 2, "c": 10}
+    scheduler = Scheduler(
+        get_dag(edges), jobs=1, schedule="critical-path", timings=timings
+    )
+    scheduler.run(build)
+    assert order == ["c", "b", "a", "root"]
+
+
+@mock.patch("yamk.lib.scheduler.THROTTLE_INTERVAL", new=0.01)
+def test_throttled_scheduler_waits_for_running_jobs() -> None:
+    running: list[str] = []
+    overlaps: list[list[str]] = []
+    lock = threading.Lock()
+
+    def build(node: Node) -> int:
+        with lock:
+            running.append(node.target)
+            overlaps.append(running.copy())
+        time.sleep(0.02)
+        with lock:
+            running.remove(node.target)
+        return 0
+
+    throttle = mock.MagicMock(spec=Throttle)
+    throttle.allows.return_value = False
+    edges = {"root": ["a", "b", "c"], "a": [], "b": [], "c": []}
+    status = Scheduler(get_dag(edges), jobs=4, throttle=throttle).run(build)
+    assert status == 0
+    assert all(len(overlap) == 1 for overlap in overlaps)
+    assert throttle.allows.call_count > 0
+
+
+@posix_only
+@mock.patch("yamk.lib.scheduler.os.getloadavg", return_value=(4.0, 1.0, 1.0))
+def test_throttle_blocks_on_high_load(getloadavg: mock.MagicMock) -> None:
+    assert Throttle(max_load=4, min_free_memory=None).allows() is False
+    assert Throttle(max_load=8, min_free_memory=None).allows() is True
+    assert getloadavg.call_count == 2
+
+
+def test_throttle_blocks_on_low_memory(tmp_path: Path) -> None:
+    meminfo = tmp_path.joinpath("meminfo")
+    meminfo.write_text("MemTotal: 4096 kB\nMemAvailable: 1024 kB\n")
+    with mock.patch("yamk.lib.scheduler.MEMINFO", new=meminfo):
+        assert Throttle(max_load=None, min_free_memory=2**21).allows() is False
+        assert Throttle(max_load=None, min_free_memory=2**19).allows() is True
+
+
+def test_throttle_ignores_missing_meminfo(tmp_path: Path) -> None:
+    with mock.patch("yamk.lib.scheduler.MEMINFO", new=tmp_path.joinpath("missing")):
+        assert Throttle(max_load=None, min_free_memory=2**40).allows() is True
+
+
+def test_keep_going_scheduler_skips_dependents() -> None:
+    order: list[str] = []
+    edges = {"root": ["a", "b"], "a": ["c"], "b": [], "c": []}
+
+    def build(node: Node) -> int:
+        order.append(node.target)
+        return 2 if node.target == "c" else 0
+
+    scheduler = Scheduler(get_dag(edges), jobs=1, keep_going=True)
+    assert scheduler.run(build) == 2
+    assert order == ["b", "c"]
+    assert [node.target for node in scheduler.failed] == ["c"]
+    assert [node.target for node in scheduler.skipped] == ["a", "root"]
+
+
+def test_released_job_frees_its_slot() -> None:
+    edges: dict[str, list[str]] = {"root": ["a", "b"], "a": [], "b": []}
+    b_done = threading.Event()
+    order: list[str] = []
+    scheduler = Scheduler(get_dag(edges), jobs=1, backoff=True)
+
+    def build(node: Node) -> int:
+        if node.target == "a":
+            with scheduler.released(node):
+                assert b_done.wait(timeout=5)
+        order.append(node.target)
+        if node.target == "b":
+            b_done.set()
+        return 0
+
+    assert scheduler.run(build) == 0
+    assert order == ["b", "a", "root"]
+
+
+def test_async_released_job_frees_its_slot() -> None:
+    edges: dict[str, list[str]] = {"root": ["a", "b"], "a": [], "b": []}
+    b_done = asyncio.Event()
+    order: list[str] = []
+    scheduler = Scheduler(get_dag(edges), jobs=1, backoff=True)
+
+    async def build(node: Node) -> int:
+        if node.target == "a":
+            async with scheduler.areleased(node):
+                await asyncio.wait_for(b_done.wait(), timeout=5)
+        order.append(node.target)
+        if node.target == "b":
+            b_done.set()
+        return 0
+
+    assert asyncio.run(scheduler.arun(build)) == 0
+    assert order == ["b", "a", "root"]
+
+
+@posix_only
+def test_scheduler_takes_jobs_from_jobserver() -> None:
+    edges: dict[str, list[str]] = {
+        "root": ["a", "b", "c", "d"],
+        "a": [],
+        "b": [],
+        "c": [],
+        "d": [],
+    }
+    lock = threading.Lock()
+    running: list[str] = []
+    concurrency: list[int] = []
+
+    def build(node: Node) -> int:
+        with lock:
+            running.append(node.target)
+            concurrency.append(len(running))
+        time.sleep(0.02)
+        with lock:
+            running.remove(node.target)
+        return 0
+
+    jobserver = Jobserver.create(2)
+    assert jobserver is not None
+    with jobserver:
+        scheduler = Scheduler(get_dag(edges), jobs=4, jobserver=jobserver)
+        assert scheduler.run(build) == 0
+        assert max(concurrency) == 2
+        assert jobserver.tokens == []
+
+
+def run_with_concurrency(scheduler: Scheduler) -> dict[str, set[str]]:
+    lock = threading.Lock()
+    running: set[str] = set()
+    overlaps: dict[str, set[str]] = {}
+
+    def build(node: Node) -> int:
+        with lock:
+            overlaps[node.target] = set(running)
+            for target in running:
+                overlaps[target].add(node.target)
+            running.add(node.target)
+        time.sleep(0.02)
+        with lock:
+            running.remove(node.target)
+        return 0
+
+    assert scheduler.run(build) == 0
+    return overlaps
+
+
+def test_scheduler_respects_pools() -> None:
+    edges: dict[str, list[str]] = {"root": ["a", "b", "c"], "a": [], "b": [], "c": []}
+    dag = get_dag(edges)
+    resources = {dag["a"]: Resources(pools=("db",)), dag["b"]: Resources(pools=("db",))}
+    scheduler = Scheduler(dag, jobs=3, resources=resources, pools={"db": 1})
+    overlaps = run_with_concurrency(scheduler)
+    assert "b" not in overlaps["a"]
+    assert overlaps["c"] & {"a", "b"}
+
+
+def test_scheduler_respects_weights() -> None:
+    edges: dict[str, list[str]] = {"root": ["a", "b", "c"], "a": [], "b": [], "c": []}
+    dag = get_dag(edges)
+    resources = {dag["a"]: Resources(weight=2), dag["c"]: Resources(weight=5)}
+    scheduler = Scheduler(dag, jobs=3, resources=resources)
+    overlaps = run_with_concurrency(scheduler)
+    assert overlaps["a"] == {"b"}
+    assert overlaps["c"] == set()
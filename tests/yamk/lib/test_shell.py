@@ -0,0 +1,73 @@
+import asyncio
+import gc
+import subprocess
+import time
+import warnings
+from pathlib import Path
+
+import pytest
+
+from yamk.lib.shell import ShellSession, await_process
+from yamk.lib.type_defs import SubprocessKwargs
+
+from tests.helpers import posix_only
+
+pytestmark = posix_only
+
+
+def get_kwargs(cwd: Path) -> SubprocessKwargs:
+    return {"shell": True, "cwd": cwd, "executable": None}
+
+
+def test_shell_session_keeps_state(tmp_path: Path) -> None:
+    tmp_path.joinpath("sub").mkdir()
+    with ShellSession(get_kwargs(tmp_path)) as session:
+        assert session.run("cd sub && VALUE=42") == 0
+        assert session.run('echo "$VALUE" > value') == 0
+    assert tmp_path.joinpath("sub", "value").read_text() == "42\n"
+
+
+def test_shell_session_reports_exit_codes(tmp_path: Path) -> None:
+    with ShellSession(get_kwargs(tmp_path)) as session:
+        assert session.run("false") == 1
+        assert session.run("(exit 3)") == 3
+        assert session.run("true") == 0
+
+
+def test_shell_session_runs_multiline_commands(tmp_path: Path) -> None:
+    with ShellSession(get_kwargs(tmp_path)) as session:
+        assert session.run("echo one > lines\necho two >> lines") == 0
+    assert tmp_path.joinpath("lines").read_text() == "one\ntwo\n"
+
+
+def test_shell_session_restarts_after_exit(tmp_path: Path) -> None:
+    with ShellSession(get_kwargs(tmp_path)) as session:
+        assert session.run("cd / && exit 7") == 7
+        assert session.run("pwd > cwd") == 0
+    assert tmp_path.joinpath("cwd").read_text() == f"{tmp_path}\n"
+
+
+def test_shell_session_kills_the_group_on_timeout(tmp_path: Path) -> None:
+    with ShellSession(get_kwargs(tmp_path), process_group=True) as session:
+        with pytest.raises(subprocess.TimeoutExpired):
+            session.run("(sleep 0.5; touch late) & sleep 5", timeout=0.1)
+        assert session.run("pwd > cwd") == 0
+    assert not tmp_path.joinpath("late").exists()
+    assert tmp_path.joinpath("cwd").read_text() == f"{tmp_path}\n"
+
+
+def test_await_process_reaps_the_process_on_timeout(tmp_path: Path) -> None:
+    async def run() -> None:
+        process = await asyncio.create_subprocess_shell(
+            "(sleep 0.5; touch late) & sleep 5", cwd=tmp_path, process_group=0
+        )
+        with pytest.raises(subprocess.TimeoutExpired):
+            await await_process(process, 0.1)
+        assert process.returncode is not None
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", ResourceWarning)
+        asyncio.run(run(), debug=True)
+        gc.collect()
+    time.sleep(0.6)
+    assert not tmp_path.joinpath("late").exists()
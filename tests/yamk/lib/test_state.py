@@ -0,0 +1,53 @@
+import json
+from pathlib import Path
+
+from yamk.lib.state import State
+
+
+def test_state_round_trip(tmp_path: Path) -> None:
+    path = tmp_path.joinpath(".yamk", "state.json")
+    state = State(path)
+    state.set("timings", "target", 42)
+    state.save()
+    assert State(path).get("timings", "target") == 42
+
+
+def test_state_merges_concurrent_writers(tmp_path: Path) -> None:
+    path = tmp_path.joinpath("state.json")
+    first = State(path)
+    second = State(path)
+    first.set("timings", "first", 1)
+    second.set("timings", "second", 2)
+    first.save()
+    second.save()
+    assert State(path).items("timings") == {"first": 1, "second": 2}
+
+
+def test_state_deletes_keys(tmp_path: Path) -> None:
+    path = tmp_path.joinpath("state.json")
+    path.write_text(json.dumps({"timings": {"stale": 1, "fresh": 2}}))
+    state = State(path)
+    state.delete("timings", "stale")
+    assert state.items("timings") == {"fresh": 2}
+    state.save()
+    assert json.loads(path.read_text()) == {"timings": {"fresh": 2}}
+
+
+def test_state_ignores_corrupt_file(tmp_path: Path) -> None:
+    path = tmp_path.joinpath("state.json")
+    path.write_text("{not json")
+    assert State(path).items("timings") == {}
+
+
+def test_state_does_not_write_without_changes(tmp_path: Path) -> None:
+    path = tmp_path.joinpath("state.json")
+    State(path).save()
+    assert not path.exists()
+
+
+def test_state_ignores_unwritable_directory(tmp_path: Path) -> None:
+    tmp_path.joinpath(".yamk").write_text("")
+    state = State(tmp_path.joinpath(".yamk", "state.json"))
+    state.set("timings", "target", 42)
+    assert not state.save()
+    assert state.get("timings", "target") == 42
@@ -18,7 +18,10 @@ from yamk.lib.utils import (
     extract_options,
     flatten_vars,
     human_readable_timestamp,
+    parse_duration,
+    parse_size,
     print_reports,
+    split_command,
 )
 
 if TYPE_CHECKING:
@@ -174,20 +177,26 @@ def test_flatten_vars_raises_on_dotted_var() -> None:
 
 
 @pytest.mark.parametrize(
-    ("success", "retries"),
+    ("success", "retries", "timed_out"),
     [
-        (False, 0),
-        (True, 1),
-        (True, 0),
+        (False, 0, False),
+        (False, 0, True),
+        (True, 1, False),
+        (True, 0, False),
     ],
 )
 def test_command_report_print(
     success: bool,
     retries: int,
+    timed_out: bool,
     capsys: mock.MagicMock,  # upgrade: pytest: check for isatty
 ) -> None:
     report = CommandReport(
-        command="ls", retries=retries, timing=Timing(seconds=1), success=success
+        command="ls",
+        retries=retries,
+        timing=Timing(seconds=1),
+        success=success,
+        timed_out=timed_out,
     )
     report.print(cols=80)
     captured = capsys.readouterr()
@@ -311,3 +320,64 @@ def test_version_parsing(version: str, major: int, minor: int, patch: int) -> No
 )
 def test_version_comparison(old_version: str, new_version: str) -> None:
     assert Version.from_string(old_version) < Version.from_string(new_version)
+
+
+@pytest.mark.parametrize(
+    ("size", "expected"),
+    [
+        ("512", 512),
+        ("1K", 1024),
+        ("1.5M", 1536 * 1024),
+        ("2G", 2 * 1024**3),
+        ("2 GiB", 2 * 1024**3),
+        ("1tb", 1024**4),
+    ],
+)
+def test_parse_size(size: str, expected: int) -> None:
+    assert parse_size(size) == expected
+
+
+def test_parse_size_raises_on_invalid_size() -> None:
+    with pytest.raises(ValueError, match="not a valid size"):
+        parse_size("lots")
+
+
+@pytest.mark.parametrize(
+    ("duration", "expected"),
+    [
+        (30, 30.0),
+        (0.5, 0.5),
+        ("90", 90.0),
+        ("250ms", 0.25),
+        ("1.5s", 1.5),
+        ("2 m", 120.0),
+        ("1H", 3600.0),
+    ],
+)
+def test_parse_duration(duration: str | float, expected: float) -> None:
+    assert parse_duration(duration) == expected
+
+
+def test_parse_duration_raises_on_invalid_duration() -> None:
+    with pytest.raises(ValueError, match="not a valid duration"):
+        parse_duration("forever")
+
+
+@pytest.mark.parametrize(
+    ("command", "expected"),
+    [
+        ("ls -la", ["ls", "-la"]),
+        ("touch 'a file'", ["touch", "a file"]),
+        ("ls | wc -l", None),
+        ("ls > out", None),
+        ("rm *.pyc", None),
+        ("cat $FILE", None),
+        ("echo hello", None),
+        ("cd src", None),
+        ("FOO=bar env", None),
+        ("touch 'unterminated", None),
+        ("", None),
+    ],
+)
+def test_split_command(command: str, expected: list[str] | None) -> None:
+    assert split_command(command) == expected
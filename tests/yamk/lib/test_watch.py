@@ -0,0 +1,62 @@
+import os
+from pathlib import Path
+from unittest import mock
+
+from yamk.lib.utils import Node
+from yamk.lib.watch import Watcher
+
+
+def test_watcher_reports_changed_files(tmp_path: Path) -> None:
+    first = tmp_path.joinpath("first")
+    second = tmp_path.joinpath("second")
+    first.write_text("1")
+    second.write_text("2")
+    first_node = Node(target=first.as_posix())
+    second_node = Node(target=second.as_posix())
+    watcher = Watcher({first_node: (first, False), second_node: (second, False)})
+    assert watcher.changes() == set()
+    os.utime(second, ns=(0, 0))
+    assert watcher.changes() == {second_node}
+    assert watcher.changes() == set()
+
+
+def test_watcher_reports_changes_in_recursive_directories(tmp_path: Path) -> None:
+    directory = tmp_path.joinpath("directory")
+    directory.joinpath("nested").mkdir(parents=True)
+    node = Node(target=directory.as_posix())
+    watcher = Watcher({node: (directory, True)})
+    directory.joinpath("nested", "file").write_text("")
+    assert watcher.changes() == {node}
+
+
+def test_watcher_reports_deleted_files(tmp_path: Path) -> None:
+    path = tmp_path.joinpath("file")
+    path.write_text("")
+    node = Node(target=path.as_posix())
+    watcher = Watcher({node: (path, False)})
+    path.unlink()
+    assert watcher.changes() == {node}
+
+
+def test_watcher_reports_deleted_files_in_recursive_directories(
+    tmp_path: Path,
+) -> None:
+    directory = tmp_path.joinpath("directory")
+    nested = directory.joinpath("nested")
+    nested.mkdir(parents=True)
+    nested.joinpath("file").write_text("")
+    os.utime(nested, ns=(0, 0))
+    node = Node(target=directory.as_posix())
+    watcher = Watcher({node: (directory, True)})
+    nested.joinpath("file").unlink()
+    assert watcher.changes() == {node}
+
+
+def test_watcher_walks_recursive_directories_with_scandir(tmp_path: Path) -> None:
+    directory = tmp_path.joinpath("directory")
+    directory.joinpath("nested").mkdir(parents=True)
+    node = Node(target=directory.as_posix())
+    watcher = Watcher({node: (directory, True)})
+    with mock.patch.object(Path, "rglob") as rglob:
+        assert watcher.changes() == set()
+    rglob.assert_not_called()
@@ -4,7 +4,7 @@ from yamk.__main__ import main
 
 
 @mock.patch("sys.argv", ["yamk", "phony"])
-@mock.patch("yamk.__main__.MakeCommand")
+@mock.patch("yamk.command.make.MakeCommand")
 def test_main(mock_make: mock.MagicMock) -> None:
     main()
     assert mock_make.call_count == 1